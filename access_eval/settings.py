@@ -21,6 +21,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "surveys.staticfiles.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -29,6 +30,14 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Per-request DB/template timings in a Server-Timing header, aggregated into
+# histograms served at /metrics to staff users or to scrapers sending
+# "Authorization: Bearer $DJANGO_METRICS_TOKEN" (unset: staff only).
+PERF_METRICS = os.getenv("DJANGO_PERF_METRICS", "True").lower() == "true"
+METRICS_TOKEN = os.getenv("DJANGO_METRICS_TOKEN", "")
+if PERF_METRICS:
+    MIDDLEWARE.insert(0, "surveys.metrics.PerformanceMiddleware")
+
 ROOT_URLCONF = "access_eval.urls"
 
 
@@ -59,6 +68,54 @@ DATABASES = {
     }
 }
 
+# SQLite production profile (on by default when DEBUG is off): WAL so readers
+# never block the writer, a busy timeout instead of instant "database is
+# locked", IMMEDIATE transactions so atomic blocks never deadlock on a
+# read->write upgrade, and persistent connections.
+SQLITE_PRODUCTION = os.getenv("DJANGO_SQLITE_PRODUCTION", str(not DEBUG)).lower() == "true"
+SQLITE_PRODUCTION_OPTIONS = {
+    "timeout": float(os.getenv("DJANGO_SQLITE_BUSY_TIMEOUT", "20")),
+    "transaction_mode": "IMMEDIATE",
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-20000;"
+        "PRAGMA mmap_size=134217728;"
+    ),
+}
+if SQLITE_PRODUCTION:
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.getenv("DJANGO_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": dict(SQLITE_PRODUCTION_OPTIONS),
+    })
+# A file, not the in-memory default, so the autosave concurrency tests lock
+# the way a deployment does (shared-cache memory DBs use table locks).
+DATABASES["default"]["TEST"] = {"NAME": str(BASE_DIR / "test_db.sqlite3")}
+
+# Batch autosave writes from concurrent requests into one transaction every
+# AUTOSAVE_COALESCE_MAX_DELAY_MS (requests wait for their batch to commit).
+AUTOSAVE_COALESCE = os.getenv("DJANGO_AUTOSAVE_COALESCE", "False").lower() == "true"
+AUTOSAVE_COALESCE_MAX_DELAY_MS = int(os.getenv("DJANGO_AUTOSAVE_COALESCE_MAX_DELAY_MS", "50"))
+
+# Alternate PDF and video documents within a run when assigning documents.
+SCHEDULER_INTERLEAVE_MEDIA = os.getenv("DJANGO_SCHEDULER_INTERLEAVE_MEDIA", "False").lower() == "true"
+
+# Cross-process state such as the question catalog version lives here, so
+# every worker must see the same cache: the default is a file cache under
+# BASE_DIR/cache; memcached/redis work too. LocMemCache is per process and
+# is rejected by a system check when DEBUG is off.
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv(
+            "DJANGO_CACHE_LOCATION", str(BASE_DIR / "cache") if CACHE_BACKEND.endswith("FileBasedCache") else ""
+        ),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = "en-us"
@@ -69,10 +126,28 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = []
+# collectstatic writes content-hashed copies plus .gz/.br siblings; the
+# StaticFilesMiddleware serves them from STATIC_ROOT by Accept-Encoding,
+# hashed names with immutable far-future caching.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "surveys.staticfiles.CompressedManifestStaticFilesStorage"},
+}
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# "" streams media from Django; "x-accel-redirect" (nginx) or "x-sendfile"
+# (Apache/lighttpd) hands the transfer to the fronting proxy instead.
+MEDIA_OFFLOAD = os.getenv("DJANGO_MEDIA_OFFLOAD", "").strip().lower()
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("DJANGO_MEDIA_ACCEL_PREFIX", "/protected-media/")
+# Seconds a cached media directory listing (size/mtime/type) is trusted.
+MEDIA_STAT_TTL = float(os.getenv("DJANGO_MEDIA_STAT_TTL", "5"))
+# Under ASGI, stream media from an async iterator with this many blocks read
+# ahead of the client instead of a threadpool-bound FileResponse.
+MEDIA_ASYNC_STREAMING = os.getenv("DJANGO_MEDIA_ASYNC_STREAMING", "True").lower() == "true"
+MEDIA_ASYNC_READ_AHEAD = int(os.getenv("DJANGO_MEDIA_ASYNC_READ_AHEAD", "4"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 X_FRAME_OPTIONS = "SAMEORIGIN"  
@@ -1,20 +1,39 @@
 # surveys/admin.py
 from django.contrib import admin
-from django.http import HttpResponse
-import csv
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
+from django.utils.text import smart_split, unescape_string_literal
 
 
-from .models import InstructionDoc, Question, ResponseSession, Answer, EvaluationRun
+from .admin_paging import DocFilter, LargeTableAdmin, RatingFilter, RunFilter, SessionDocFilter, SessionRunFilter
+from . import search
+from .exports import WRITERS, answer_rows
+from .ingest import MEDIA_FIELDS, inspect_media
+from .models import InstructionDoc, Question, RatingSummary, ResponseSession, Answer, EvaluationRun
+from .reliability import DEFAULT_BOOTSTRAP, NumpyMissing, reliability_report
 
 
 
 
 @admin.register(InstructionDoc)
 class InstructionDocAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "version", "is_active", "open_pdf")
-    list_filter = ("is_active",)
+    list_display = ("id", "title", "version", "media_kind", "is_active", "has_text_layer", "ocr_status", "open_pdf")
+    list_filter = ("is_active", "media_kind", "has_text_layer", "ocr_status", "faststart")
     search_fields = ("title",)
+    readonly_fields = MEDIA_FIELDS
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "file" in form.changed_data:
+            # Uploaded MP4s also get moov moved in front (see surveys.mp4).
+            fields, _ = inspect_media(obj.file.path)
+            for field, value in fields.items():
+                setattr(obj, field, value)
+            obj.save(update_fields=list(fields))
 
     def open_pdf(self, obj):
         if not obj.file:
@@ -57,7 +76,7 @@ class ResponseSessionInline(admin.TabularInline):
 
 
 @admin.register(EvaluationRun)
-class EvaluationRunAdmin(admin.ModelAdmin):
+class EvaluationRunAdmin(LargeTableAdmin):
     
     list_display = ("id", "user_token", "total_steps", "created_at", "finished_at")
     list_filter = ("finished_at",)
@@ -65,16 +84,23 @@ class EvaluationRunAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
     inlines = [ResponseSessionInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("plan")
+
 
 
 
 @admin.register(ResponseSession)
-class ResponseSessionAdmin(admin.ModelAdmin):
+class ResponseSessionAdmin(LargeTableAdmin):
     list_display = ("id", "run", "doc", "open_doc_pdf", "user_token", "started_at", "finished_at")
-    list_filter = ("doc", "run", "started_at", "finished_at")
+    list_filter = (DocFilter, RunFilter, "started_at", "finished_at")
+    list_select_related = ("run", "doc")
     search_fields = ("user_token", "doc__title")
     inlines = [AnswerInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("run__plan", "doc__alt_html")
+
     def open_doc_pdf(self, obj):
         if not obj.doc or not obj.doc.file:
             return "-"
@@ -87,44 +113,30 @@ class ResponseSessionAdmin(admin.ModelAdmin):
 
 
 
-def export_answers_to_csv(modeladmin, request, queryset):
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="answers.csv"'
-    writer = csv.writer(response)
-    writer.writerow([
-        "answer_id",
-        "session_id",
-        "doc_title",
-        "question_key",
-        "rating",
-        "reason_text",
-        "improvement_text",
-        "session_started_at",
-        "session_finished_at",
-        "user_token",
-    ])
-
-    qs = queryset.select_related("session", "question", "session__doc")
-    for a in qs:
-        writer.writerow([
-            a.id,
-            a.session_id,
-            a.session.doc.title if a.session and a.session.doc_id else "",
-            a.question.key if a.question_id else "",
-            a.rating_int,
-            (a.reason_text or "").replace("\r", " ").replace("\n", " "),
-            (a.improvement_text or "").replace("\r", " ").replace("\n", " "),
-            a.session.started_at if a.session_id else "",
-            a.session.finished_at if a.session_id else "",
-            a.session.user_token if a.session_id else "",
-        ])
+def _stream_answers(queryset, fmt):
+    lines, content_type = WRITERS[fmt]
+    response = StreamingHttpResponse(
+        (line.encode("utf-8") for line in lines(answer_rows(queryset))),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="answers.{fmt}"'
     return response
 
+
+def export_answers_to_csv(modeladmin, request, queryset):
+    return _stream_answers(queryset, "csv")
+
 export_answers_to_csv.short_description = "Export selected answers to CSV"
 
 
+def export_answers_to_jsonl(modeladmin, request, queryset):
+    return _stream_answers(queryset, "jsonl")
+
+export_answers_to_jsonl.short_description = "Export selected answers to JSON Lines"
+
+
 @admin.register(Answer)
-class AnswerAdmin(admin.ModelAdmin):
+class AnswerAdmin(LargeTableAdmin):
     list_display = (
         "id",
         "get_run_id",
@@ -135,9 +147,33 @@ class AnswerAdmin(admin.ModelAdmin):
         "short_improvement",
         "get_user_token",
     )
-    list_filter = ("rating_int", "question", "session__doc", "session__run")
+    list_filter = (RatingFilter, "question", SessionDocFilter, SessionRunFilter)
+    list_select_related = ("session__doc", "question")
     search_fields = ("reason_text", "improvement_text", "session__user_token", "session__doc__title")
-    actions = [export_answers_to_csv]
+    search_help_text = 'Every word must match the answer text ("phrases", prefix*), user token or document title.'
+    actions = [export_answers_to_csv, export_answers_to_jsonl]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("session__doc__alt_html")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Like the default search, every word must match one of the fields,
+        # but answer text goes through the FTS5 index instead of LIKE '%..%'
+        # and the token/title lookups run against the smaller session and doc
+        # tables as subqueries.
+        if not search.available():
+            return super().get_search_results(request, queryset, search_term)
+        match = Q()
+        for bit in smart_split(search_term):
+            word = unescape_string_literal(bit) if bit[:1] in ('"', "'") and bit[-1:] == bit[:1] else bit
+            sessions = ResponseSession.objects.filter(user_token__icontains=word).values("id")
+            docs = InstructionDoc.objects.filter(title__icontains=word).values("id")
+            word_match = Q(session_id__in=sessions) | Q(session__doc_id__in=docs)
+            query = search.fts_query(bit)
+            if query:
+                word_match |= Q(id__in=search.matching_ids(query))
+            match &= word_match
+        return queryset.filter(match), False
 
     def get_run_id(self, obj):
         return obj.session.run_id if obj.session and obj.session.run_id else "-"
@@ -159,3 +195,72 @@ class AnswerAdmin(admin.ModelAdmin):
         return (obj.improvement_text or "")[:60]
     short_improvement.short_description = "Improvement"
 
+
+
+@admin.register(RatingSummary)
+class RatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ("doc", "question", "count", "get_mean", "get_stddev", "get_ci95", "min_rating", "max_rating")
+    list_filter = ("question", "doc")
+    list_select_related = ("doc", "question")
+    search_fields = ("doc__title",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Rows are running totals; deleting one would silently drop counts.
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "reliability/",
+                self.admin_site.admin_view(self.reliability_view),
+                name="surveys_ratingsummary_reliability",
+            ),
+        ] + super().get_urls()
+
+    def reliability_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Inter-rater reliability",
+            "opts": self.model._meta,
+        }
+        try:
+            bootstrap = max(0, min(int(request.GET.get("bootstrap", DEFAULT_BOOTSTRAP)), 10_000))
+        except ValueError:
+            bootstrap = DEFAULT_BOOTSTRAP
+        try:
+            report = reliability_report(bootstrap=bootstrap)
+        except NumpyMissing as exc:
+            context["error"] = str(exc)
+            return TemplateResponse(request, "admin/surveys/reliability.html", context)
+
+        labels = dict(Question.DIM_CHOICES)
+        keys = [d["key"] for d in report["dimensions"]]
+        context.update(
+            report=report,
+            dimension_labels=[labels.get(k, k) for k in keys],
+            dimension_rows=[{"label": labels.get(d["key"], d["key"]), **d} for d in report["dimensions"]]
+            + [{"label": "All dimensions", **report["overall"]}],
+            doc_rows=[{**doc, "rwg": [doc["dimensions"][k]["rwg"] for k in keys]} for doc in report["docs"]],
+        )
+        return TemplateResponse(request, "admin/surveys/reliability.html", context)
+
+    def get_mean(self, obj):
+        return f"{obj.mean:.2f}" if obj.mean is not None else "-"
+    get_mean.short_description = "Mean"
+
+    def get_stddev(self, obj):
+        return f"{obj.variance ** 0.5:.2f}" if obj.variance is not None else "-"
+    get_stddev.short_description = "Std dev"
+
+    def get_ci95(self, obj):
+        ci = obj.ci95
+        return f"{ci[0]:.2f} – {ci[1]:.2f}" if ci else "-"
+    get_ci95.short_description = "95% CI"
@@ -0,0 +1,163 @@
+# surveys/admin_paging.py
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from .models import EvaluationRun, InstructionDoc
+
+CURSOR_VAR = "after"
+RECENT_RUNS = 30
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips the full ``COUNT(*)`` on big unfiltered changelists.
+
+    Counting stops after ``estimate_above`` rows. Past that an unfiltered
+    list reports ``MAX(pk)``, which is one index lookup and close to the
+    real count because rows are rarely deleted. Filtered lists are still
+    counted exactly.
+    """
+
+    estimate_above = 10_000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        n = qs[: self.estimate_above + 1].count()
+        if n <= self.estimate_above:
+            return n
+        if qs.query.where:
+            return qs.count()
+        self.estimated = True
+        return max(n, qs.aggregate(top=Max("pk"))["top"] or 0)
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList that pages by ``?after=<pk>`` instead of OFFSET past ``max_offset_page``.
+
+    Keyset pages only apply to the default newest-first ordering; a column
+    sort falls back to numbered pages.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.cursor = int(request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            self.cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and page links start over from the first page.
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        self.keyset = ORDER_VAR not in self.params
+        max_page = self.model_admin.max_offset_page
+        if self.keyset and self.page_num > max_page:
+            raise IncorrectLookupParameters(f"Pages past {max_page} are reached with ?{CURSOR_VAR}=")
+
+        if self.keyset and self.cursor is not None:
+            paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+            self.result_count = paginator.count
+            self.show_full_result_count = self.model_admin.show_full_result_count
+            self.full_result_count = None
+            self.show_admin_actions = True
+            self.result_list = self.queryset.filter(pk__lt=self.cursor)[: self.list_per_page]
+            self.can_show_all = False
+            self.multi_page = True
+            self.paginator = paginator
+        else:
+            super().get_results(request)
+
+        self.estimated_count = getattr(self.paginator, "estimated", False)
+        self.offset_page_range = []
+        self.next_page_url = None
+        if not self.keyset or not self.multi_page or (self.show_all and self.can_show_all):
+            return
+        if self.cursor is None:
+            self.offset_page_range = range(1, min(self.paginator.num_pages, max_page) + 1)
+        rows = list(self.result_list)
+        if len(rows) == self.list_per_page:
+            self.next_page_url = self.get_query_string({CURSOR_VAR: rows[-1].pk}, remove=[PAGE_VAR])
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow with every response: no exact counts, keyset deep pages."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ("-id",)
+    max_offset_page = 10
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class RunFilter(admin.SimpleListFilter):
+    """The latest runs as choices; ``?run=<id>`` still filters by any run."""
+
+    title = "run"
+    parameter_name = "run"
+    run_lookup = "run"
+
+    def lookups(self, request, model_admin):
+        runs = EvaluationRun.objects.only("id", "user_token").order_by("-id")[:RECENT_RUNS]
+        return [(r.pk, str(r)) for r in runs]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.run_lookup: self.value()})
+        return queryset
+
+
+class SessionRunFilter(RunFilter):
+    run_lookup = "session__run"
+
+
+class DocFilter(admin.SimpleListFilter):
+    """Document choices without loading alt_html for every document."""
+
+    title = "document"
+    parameter_name = "doc"
+    doc_lookup = "doc"
+
+    def lookups(self, request, model_admin):
+        docs = InstructionDoc.objects.only("id", "title", "version").order_by("title")
+        return [(d.pk, str(d)) for d in docs]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.doc_lookup: self.value()})
+        return queryset
+
+
+class SessionDocFilter(DocFilter):
+    doc_lookup = "session__doc"
+
+
+class RatingFilter(admin.SimpleListFilter):
+    """Fixed 1-7 choices instead of a DISTINCT over every answer."""
+
+    title = "rating"
+    parameter_name = "rating"
+
+    def lookups(self, request, model_admin):
+        return [(r, str(r)) for r in range(1, 8)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(rating_int=self.value())
+        return queryset
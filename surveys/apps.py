@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class SurveysConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "surveys"
+
+    def ready(self):
+        from . import catalog, checks, stats  # noqa: F401  (registers model signals and checks)
@@ -0,0 +1,198 @@
+# surveys/autosave.py
+import queue
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import Answer
+from .stats import record_rating_changes
+
+ANSWER_FIELDS = ["rating_int", "reason_text", "improvement_text"]
+
+# One autosave write: field ``updates`` for the answer to ``question_id`` in ``session_id``.
+PartialAnswer = namedtuple("PartialAnswer", ["session_id", "doc_id", "question_id", "updates"])
+
+
+def partial_updates(payload):
+    """Validate one autosave payload into Answer field updates; returns (updates, error)."""
+    if not isinstance(payload, dict):
+        return None, "bad_json"
+
+    updates = {}
+    if "rating" in payload and payload["rating"] not in (None, ""):
+        try:
+            r = int(payload["rating"])
+        except Exception:
+            return None, "invalid_rating"
+        if r < 1 or r > 7:
+            return None, "rating_out_of_range"
+        updates["rating_int"] = r
+
+    if "reason" in payload:
+        updates["reason_text"] = (payload["reason"] or "").strip()
+
+    if "improve" in payload:
+        updates["improvement_text"] = (payload["improve"] or "").strip()
+
+    if not updates:
+        return None, "no_fields"
+    return updates, None
+
+
+def write_partial_answers(items):
+    """
+    Apply PartialAnswer items in order inside the caller's transaction.
+
+    Later items for the same answer win field by field. Costs one SELECT, one
+    Answer upsert and one summary upsert per doc however many items there
+    are. Returns an error code (or None) per item.
+    """
+    errors = [None] * len(items)
+    existing = {}
+    if items:
+        qs = Answer.objects.filter(
+            session_id__in={i.session_id for i in items},
+            question_id__in={i.question_id for i in items},
+        )
+        existing = {(a.session_id, a.question_id): a for a in qs}
+
+    old_ratings = {key: a.rating_int for key, a in existing.items()}
+    rows = {}
+    docs = {}
+    for n, item in enumerate(items):
+        key = (item.session_id, item.question_id)
+        a = rows.get(key) or existing.get(key)
+        if a is None:
+            if "rating_int" not in item.updates:
+                # rating_int is NOT NULL; the client keeps the text until a rating arrives.
+                errors[n] = "rating_required"
+                continue
+            a = Answer(session_id=item.session_id, question_id=item.question_id)
+        for field, value in item.updates.items():
+            setattr(a, field, value)
+        rows[key] = a
+        docs[key] = item.doc_id
+
+    if rows:
+        Answer.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=["session", "question"],
+            update_fields=ANSWER_FIELDS,
+        )
+        changes = defaultdict(list)
+        for key, a in rows.items():
+            changes[docs[key]].append((a.question_id, old_ratings.get(key), a.rating_int))
+        for doc_id, doc_changes in changes.items():
+            record_rating_changes(doc_id, doc_changes)
+    return errors
+
+
+class _Ticket:
+    def __init__(self, items):
+        self.items = items
+        self.errors = None
+        self.exception = None
+        self.done = threading.Event()
+
+
+class AutosaveCoalescer:
+    """
+    Funnel autosave writes from concurrent requests through one writer thread.
+
+    The thread takes everything queued within ``max_delay`` seconds of the
+    first waiting ticket and commits it as a single transaction, so a burst of
+    N autosaves costs one write lock instead of N. Callers block until their
+    batch has committed, so a successful response still means the data is
+    stored.
+    """
+
+    def __init__(self, max_delay: float, max_batch: int = 1000):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="autosave-coalescer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, items):
+        ticket = _Ticket(items)
+        self._ensure_thread()
+        self._queue.put(ticket)
+        ticket.done.wait()
+        if ticket.exception is not None:
+            raise ticket.exception
+        return ticket.errors
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0].items)
+        deadline = time.monotonic() + self.max_delay
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                ticket = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(ticket)
+            size += len(ticket.items)
+        return batch
+
+    def _write(self, batch):
+        with transaction.atomic():
+            errors = write_partial_answers([i for t in batch for i in t.items])
+        offset = 0
+        for t in batch:
+            t.errors = errors[offset:offset + len(t.items)]
+            offset += len(t.items)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                close_old_connections()
+                try:
+                    self._write(batch)
+                except Exception:
+                    if len(batch) == 1:
+                        raise
+                    # The batch rolled back as a whole: write each ticket on
+                    # its own so only the offending request sees the error.
+                    for t in batch:
+                        try:
+                            self._write([t])
+                        except Exception as exc:
+                            t.exception = exc
+            except Exception as exc:
+                for t in batch:
+                    t.exception = exc
+            finally:
+                for t in batch:
+                    t.done.set()
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def save_partial_answers(items):
+    """Write PartialAnswer items, through the coalescer when AUTOSAVE_COALESCE is on."""
+    global _coalescer
+    if settings.AUTOSAVE_COALESCE:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = AutosaveCoalescer(settings.AUTOSAVE_COALESCE_MAX_DELAY_MS / 1000)
+        return _coalescer.submit(items)
+    with transaction.atomic():
+        return write_partial_answers(items)
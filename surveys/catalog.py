@@ -0,0 +1,57 @@
+# surveys/catalog.py
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .forms import evaluation_form_class
+from .models import Question
+
+VERSION_KEY = "surveys:question_catalog:version"
+
+Catalog = namedtuple("Catalog", ["version", "questions", "form_class"])
+
+_catalog: Catalog | None = None
+
+
+def catalog_version() -> int:
+    """
+    Current catalog version, shared by every worker through the default cache.
+
+    A missing key is seeded from the clock rather than 1, so an evicted key
+    never repeats a version some process still holds.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_catalog() -> Catalog:
+    """Active questions and their prebuilt form class, rebuilt once per version."""
+    global _catalog
+    version = catalog_version()
+    current = _catalog
+    if current is None or current.version != version:
+        questions = tuple(Question.objects.filter(is_active=True).order_by("order", "id"))
+        current = Catalog(version, questions, evaluation_form_class(questions))
+        _catalog = current
+    return current
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def _question_changed(sender, **kwargs):
+    # Bump after commit so other workers can't reload the old rows under the new version.
+    transaction.on_commit(bump_catalog_version)
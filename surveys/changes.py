@@ -0,0 +1,93 @@
+# surveys/changes.py
+"""
+Incremental sync from the ChangeLog.
+
+A consumer stores the ``next`` sequence number of each page and asks for
+the changes after it. Every change carries the row as it is when read, so a
+page is applied as upserts and deletes keyed by (model, id), and repeated
+entries for one row collapse to the last one. Sequence numbers come from an
+AUTOINCREMENT key and SQLite has a single writer, so they are assigned in
+commit order: nothing can later appear below a ``next`` already returned.
+"""
+from django.db import connection
+from django.db.models import Max
+
+from .models import Answer, ChangeLog, EvaluationRun, ResponseSession
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10_000
+
+# model_name as logged by the triggers -> (model, exported fields)
+TRACKED = {
+    "answer": (Answer, ["id", "session_id", "question_id", "rating_int", "reason_text", "improvement_text"]),
+    "responsesession": (
+        ResponseSession,
+        ["id", "run_id", "doc_id", "user_token", "started_at", "finished_at", "consented"],
+    ),
+    "evaluationrun": (EvaluationRun, ["id", "user_token", "created_at", "finished_at", "total_steps", "plan"]),
+}
+
+
+def available() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def latest_seq() -> int:
+    """Sequence number of the newest change (0 for an empty log): a starting point after a full copy."""
+    return ChangeLog.objects.aggregate(seq=Max("id"))["seq"] or 0
+
+
+def read_changes(after: int = 0, limit: int = DEFAULT_LIMIT):
+    """
+    Up to ``limit`` log entries after sequence number ``after``.
+
+    Returns ``(changes, next_seq, more)``. Each change is ``{"seq", "model",
+    "id", "op", "row"}`` with op ``"upsert"`` (``row`` holds the current
+    fields) or ``"delete"`` (``row`` is None). One log range scan plus one
+    query per tracked model, whatever the page size.
+    """
+    entries = list(
+        ChangeLog.objects.filter(id__gt=after).order_by("id").values_list("id", "model", "object_id", "op")[:limit]
+    )
+    if not entries:
+        return [], after, False
+
+    last = {}
+    for seq, model, object_id, op in entries:
+        last.pop((model, object_id), None)
+        last[(model, object_id)] = (seq, op)
+
+    rows = {}
+    for model, (cls, fields) in TRACKED.items():
+        ids = [object_id for (m, object_id), (_, op) in last.items() if m == model and op != ChangeLog.DELETE]
+        if ids:
+            rows[model] = {r["id"]: r for r in cls.objects.filter(id__in=ids).values(*fields)}
+
+    changes = []
+    for (model, object_id), (seq, op) in last.items():
+        # A row missing here was deleted after this page's entry: its delete
+        # entry is further on, but sending the delete now is equivalent.
+        row = rows.get(model, {}).get(object_id) if op != ChangeLog.DELETE else None
+        changes.append({
+            "seq": seq,
+            "model": model,
+            "id": object_id,
+            "op": "upsert" if row is not None else "delete",
+            "row": row,
+        })
+    return changes, entries[-1][0], len(entries) == limit
+
+
+def iter_changes(after: int = 0, batch: int = DEFAULT_LIMIT):
+    """Yield ``(changes, next_seq)`` pages until the log is drained."""
+    more = True
+    while more:
+        changes, after, more = read_changes(after, batch)
+        if changes:
+            yield changes, after
+
+
+def prune(through: int) -> int:
+    """Delete log entries up to and including ``through``, once every consumer is past it."""
+    deleted, _ = ChangeLog.objects.filter(id__lte=through).delete()
+    return deleted
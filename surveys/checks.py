@@ -0,0 +1,21 @@
+# surveys/checks.py
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .catalog import VERSION_KEY
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """The catalog version must be visible to every worker process."""
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.DEBUG or not backend.endswith("LocMemCache"):
+        return []
+    return [
+        Error(
+            f"The default cache ({backend}) is private to each process, so {VERSION_KEY!r} "
+            "changes made in one worker never reach the others.",
+            hint="Set DJANGO_CACHE_BACKEND to a shared backend (the default FileBasedCache, memcached or redis).",
+            id="surveys.E001",
+        )
+    ]
@@ -0,0 +1,86 @@
+# surveys/exports.py
+import csv
+import json
+
+from .models import Answer, ResponseSession
+
+CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    ("answer_id", "id"),
+    ("session_id", "session_id"),
+    ("doc_title", "session__doc__title"),
+    ("question_key", "question__key"),
+    ("rating", "rating_int"),
+    ("reason_text", "reason_text"),
+    ("improvement_text", "improvement_text"),
+    ("session_started_at", "session__started_at"),
+    ("session_finished_at", "session__finished_at"),
+    ("user_token", "session__user_token"),
+    # Appended after the original columns so positional CSV readers keep working.
+    ("run_id", "session__run_id"),
+]
+EXPORT_COLUMNS = [name for name, _ in EXPORT_FIELDS]
+
+
+def filter_answers(qs=None, *, run=None, doc=None, since=None, until=None):
+    """Narrow an Answer queryset by run id, doc id and session start datetime."""
+    qs = Answer.objects.all() if qs is None else qs
+    if run is not None:
+        qs = qs.filter(session__run_id=run)
+    if doc is not None:
+        qs = qs.filter(session__doc_id=doc)
+    if since is not None or until is not None:
+        # IN (subquery) lets SQLite seek session_started_idx, then answers by session.
+        sessions = ResponseSession.objects.all()
+        if since is not None:
+            sessions = sessions.filter(started_at__gte=since)
+        if until is not None:
+            sessions = sessions.filter(started_at__lt=until)
+        qs = qs.filter(session_id__in=sessions.values("id"))
+    return qs
+
+
+def answer_rows(qs):
+    """Yield plain tuples in EXPORT_COLUMNS order without building model instances."""
+    return (
+        qs.order_by("id")
+        .values_list(*[lookup for _, lookup in EXPORT_FIELDS])
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _flatten(text):
+    return (text or "").replace("\r", " ").replace("\n", " ")
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    reason = EXPORT_COLUMNS.index("reason_text")
+    improve = EXPORT_COLUMNS.index("improvement_text")
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        row = list(row)
+        row[reason] = _flatten(row[reason])
+        row[improve] = _flatten(row[improve])
+        yield writer.writerow(["" if v is None else v for v in row])
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default, ensure_ascii=False) + "\n"
+
+
+WRITERS = {
+    "csv": (csv_lines, "text/csv"),
+    "jsonl": (jsonl_lines, "application/x-ndjson"),
+}
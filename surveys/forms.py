@@ -8,64 +8,75 @@ from .models import Question
 _ALPHA_RE = re.compile(r"[A-Za-z]")
 
 
+def question_fields(q: Question) -> dict[str, forms.Field]:
+    rating = forms.IntegerField(
+        label=f"Rating for {q.get_key_display()} (1–7)",
+        min_value=1,
+        max_value=7,
+        widget=forms.NumberInput(
+            attrs={
+                "class": "rating-input",
+                "inputmode": "numeric",
+                "min": "1",
+                "max": "7",
+                "step": "1",
+                "placeholder": "Type 1–7",
+                "aria-label": f"Rating for {q.get_key_display()} from 1 to 7",
+                "aria-describedby": f"hint_{q.id}",
+                "pattern": "^[1-7]$",
+            }
+        ),
+        error_messages={
+            "required": "Please enter a rating from 1 to 7.",
+            "min_value": "Minimum rating is 1.",
+            "max_value": "Maximum rating is 7.",
+            "invalid": "Please enter a whole number from 1 to 7.",
+        },
+    )
+
+    reason = forms.CharField(
+        label="Reason",
+        required=True,
+        widget=forms.Textarea(
+            attrs={
+                "rows": 2,
+                "aria-label": f"Reason for {q.get_key_display()} rating",
+            }
+        ),
+        error_messages={
+            "required": "Please explain why you chose this rating.",
+        },
+    )
+
+    improve = forms.CharField(
+        label="How to make it better",
+        required=True,
+        widget=forms.Textarea(
+            attrs={
+                "rows": 2,
+                "aria-label": f"Improvements for {q.get_key_display()}",
+            }
+        ),
+        error_messages={
+            "required": "Please suggest how these instructions could be improved.",
+        },
+    )
+    return {
+        f"rating_{q.id}": rating,
+        f"reason_{q.id}": reason,
+        f"improve_{q.id}": improve,
+    }
+
+
 class EvaluationForm(forms.Form):
-    def __init__(self, *args, questions: list[Question], **kwargs):
+    questions: tuple[Question, ...] = ()
+
+    def __init__(self, *args, questions: list[Question] | None = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.questions = list(questions or [])
-
-        for idx, q in enumerate(self.questions):
-            self.fields[f"rating_{q.id}"] = forms.IntegerField(
-                label=f"Rating for {q.get_key_display()} (1–7)",
-                min_value=1,
-                max_value=7,
-                widget=forms.NumberInput(
-                    attrs={
-                        "class": "rating-input",
-                        "inputmode": "numeric",
-                        "min": "1",
-                        "max": "7",
-                        "step": "1",
-                        "placeholder": "Type 1–7",
-                        "aria-label": f"Rating for {q.get_key_display()} from 1 to 7",
-                        "aria-describedby": f"hint_{q.id}",
-                        "pattern": "^[1-7]$",
-                    }
-                ),
-                error_messages={
-                    "required": "Please enter a rating from 1 to 7.",
-                    "min_value": "Minimum rating is 1.",
-                    "max_value": "Maximum rating is 7.",
-                    "invalid": "Please enter a whole number from 1 to 7.",
-                },
-            )
-
-            self.fields[f"reason_{q.id}"] = forms.CharField(
-                label="Reason",
-                required=True,
-                widget=forms.Textarea(
-                    attrs={
-                        "rows": 2,
-                        "aria-label": f"Reason for {q.get_key_display()} rating",
-                    }
-                ),
-                error_messages={
-                    "required": "Please explain why you chose this rating.",
-                },
-            )
-
-            self.fields[f"improve_{q.id}"] = forms.CharField(
-                label="How to make it better",
-                required=True,
-                widget=forms.Textarea(
-                    attrs={
-                        "rows": 2,
-                        "aria-label": f"Improvements for {q.get_key_display()}",
-                    }
-                ),
-                error_messages={
-                    "required": "Please suggest how these instructions could be improved.",
-                },
-            )
+        if questions is not None:
+            self.questions = list(questions)
+            for q in self.questions:
+                self.fields.update(question_fields(q))
 
     def _validate_free_text(self, value: str, label: str) -> None:
         if not value:
@@ -114,3 +125,9 @@ class EvaluationForm(forms.Form):
         return cleaned
 
 
+def evaluation_form_class(questions) -> type[EvaluationForm]:
+    """Build an EvaluationForm subclass with the question fields declared once."""
+    attrs = {"questions": tuple(questions)}
+    for q in attrs["questions"]:
+        attrs.update(question_fields(q))
+    return type("EvaluationForm", (EvaluationForm,), attrs)
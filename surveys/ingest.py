@@ -0,0 +1,52 @@
+# surveys/ingest.py
+# Process-pool workers for load_pdfs; keep this module free of Django imports
+# so it also loads in spawned (macOS/Windows) worker processes.
+import hashlib
+import os
+
+from .mediatypes import guess_mime, media_kind_for
+from .mp4 import faststart_result
+
+MEDIA_FIELDS = [
+    "media_kind", "mime_type", "content_hash", "file_size", "file_mtime_ns",
+    "duration_seconds", "faststart", "box_layout",
+]
+
+
+def sha256_file(path: str) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def is_mp4(path: str) -> bool:
+    return path.lower().endswith(".mp4")
+
+
+def inspect_media(path: str, stage_dir: str | None = None):
+    """
+    InstructionDoc field values for ``path`` (see MEDIA_FIELDS) and the file
+    a faststart rewrite was written to, or None.
+
+    MP4s are moved to faststart first, so size, mtime and hash describe the
+    file that will be served. With ``stage_dir`` the rewrite goes to a new
+    file there and ``path`` is left as it is (sources outside MEDIA_ROOT).
+    """
+    fields = {
+        "media_kind": media_kind_for(path),
+        "mime_type": guess_mime(path),
+        "duration_seconds": None,
+        "faststart": None,
+        "box_layout": "",
+    }
+    written = None
+    if is_mp4(path):
+        dest = None
+        if stage_dir:
+            dest = os.path.join(stage_dir, hashlib.sha256(path.encode()).hexdigest()[:24] + ".mp4")
+        fields["faststart"], fields["box_layout"], fields["duration_seconds"], rewritten = faststart_result(path, dest)
+        if rewritten:
+            written = dest or path
+    served = written or path
+    st = os.stat(served)
+    fields.update(content_hash=sha256_file(served), file_size=st.st_size, file_mtime_ns=st.st_mtime_ns)
+    return fields, written
@@ -0,0 +1,86 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from surveys.autosave import AutosaveCoalescer, PartialAnswer, write_partial_answers
+from surveys.models import EvaluationRun, InstructionDoc, Question, ResponseSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the autosave write path from concurrent threads and report "
+        "'database is locked' errors and latency for the current database settings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--writes", type=int, default=50, help="Autosaves per thread")
+        parser.add_argument("--coalesce", action="store_true", help="Route writes through an AutosaveCoalescer")
+
+    def handle(self, *args, **opts):
+        questions = list(Question.objects.values_list("id", flat=True))
+        if not questions:
+            self.stderr.write("No questions; run seed_questions first.")
+            return
+
+        # Scratch rows, removed again at the end.
+        doc = InstructionDoc.objects.create(title="autosave-contention-probe", is_active=False)
+        run = EvaluationRun.objects.create(user_token="autosave-contention-probe")
+        sessions = ResponseSession.objects.bulk_create(
+            [ResponseSession(run=run, doc=doc) for _ in range(opts["threads"])]
+        )
+
+        if opts["coalesce"]:
+            coalescer = AutosaveCoalescer(settings.AUTOSAVE_COALESCE_MAX_DELAY_MS / 1000)
+            write = coalescer.submit
+        else:
+            def write(items):
+                with transaction.atomic():
+                    return write_partial_answers(items)
+
+        latencies = []
+        locked = []
+        failed = []
+
+        def worker(sess):
+            try:
+                for n in range(opts["writes"]):
+                    item = PartialAnswer(sess.id, doc.id, questions[n % len(questions)], {
+                        "rating_int": n % 7 + 1,
+                        "reason_text": f"reason {n}",
+                    })
+                    t0 = time.perf_counter()
+                    try:
+                        write([item])
+                    except OperationalError as exc:
+                        (locked if "locked" in str(exc) else failed).append(exc)
+                        continue
+                    latencies.append(time.perf_counter() - t0)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in sessions]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        run.delete()
+        doc.delete()
+
+        total = opts["threads"] * opts["writes"]
+        self.stdout.write(
+            f"profile={'production' if settings.SQLITE_PRODUCTION else 'default'} "
+            f"coalesce={opts['coalesce']} threads={opts['threads']} writes={total}"
+        )
+        self.stdout.write(f"ok={len(latencies)} locked={len(locked)} other_errors={len(failed)} "
+                          f"throughput={len(latencies) / elapsed:.0f}/s")
+        if latencies:
+            q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            self.stdout.write(f"latency_ms p50={q[49] * 1000:.1f} p95={q[94] * 1000:.1f} p99={q[98] * 1000:.1f}")
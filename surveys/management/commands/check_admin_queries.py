@@ -0,0 +1,69 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from surveys.admin_paging import CURSOR_VAR, EstimatedCountPaginator
+from surveys.models import Answer, EvaluationRun, ResponseSession
+
+# Queries per changelist page whatever the number of rows: the capped count,
+# the page, one per list filter with database choices and two for
+# date_hierarchy. Past EstimatedCountPaginator.estimate_above an unfiltered
+# list adds MAX(pk). surveys/tests/test_admin_queries.py pins the same counts.
+BUDGETS = {
+    Answer: 5,
+    ResponseSession: 4,
+    EvaluationRun: 4,
+}
+ESTIMATE_QUERIES = 1
+
+
+def changelist_queries(model, params):
+    """``(query count, rows, queries)`` rendering the admin changelist of ``model`` with GET ``params``."""
+    model_admin = admin.site._registry[model]
+    request = RequestFactory().get(f"/admin/{model._meta.app_label}/{model._meta.model_name}/", params)
+    # An unsaved active superuser passes every permission check without queries.
+    request.user = get_user_model()(is_active=True, is_staff=True, is_superuser=True)
+    with CaptureQueriesContext(connection) as ctx:
+        response = model_admin.changelist_view(request)
+        response.render()
+    if response.status_code != 200:
+        raise CommandError(f"{model.__name__} changelist {params}: HTTP {response.status_code}")
+    cl = response.context_data["cl"]
+    return len(ctx.captured_queries), len(cl.result_list), ctx.captured_queries
+
+
+class Command(BaseCommand):
+    help = "Render the Answer, ResponseSession and EvaluationRun changelists and fail if a page exceeds its query budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--show-sql", action="store_true", help="Print the queries of every page")
+
+    def handle(self, *args, **opts):
+        failures = []
+        for model, budget in BUDGETS.items():
+            top = model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+            big = model.objects.all()[: EstimatedCountPaginator.estimate_above + 1].count() > EstimatedCountPaginator.estimate_above
+            budget += ESTIMATE_QUERIES if big else 0
+            pages = {
+                "first page": {},
+                "page 2": {"p": 2},
+                "keyset page": {CURSOR_VAR: top // 2 + 1},
+                "sorted by id": {"o": "1"},
+                "search": {"q": "a"},
+            }
+            for label, params in pages.items():
+                n, rows, queries = changelist_queries(model, params)
+                over = n > budget
+                self.stdout.write(f"{'FAIL' if over else 'ok  '} {model.__name__} {label}: {n} queries, {rows} rows")
+                if over or opts["show_sql"]:
+                    for q in queries:
+                        self.stdout.write(f"       {q['sql'][:200]}")
+                if over:
+                    failures.append(f"{model.__name__} {label}: {n} > {budget}")
+
+        if failures:
+            raise CommandError("Changelist query budgets exceeded:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All changelist pages are within their query budgets."))
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from surveys.exports import filter_answers
+from surveys.models import (
+    Answer,
+    ChangeLog,
+    EvaluationRun,
+    InstructionDoc,
+    RatingSummary,
+    ResponseSession,
+    RunProgress,
+)
+
+
+def answer_rows_queryset(qs):
+    return qs.order_by("id").values_list("id")
+
+
+def hot_queries():
+    """The request-path and admin queries that must stay index-backed."""
+    since = timezone.now() - timedelta(days=1)
+    return {
+        "home/restore: open progress for user": RunProgress.objects.filter(
+            user_token="u", is_finished=False
+        ).order_by("-updated_at")[:1],
+        "evaluate/done: update open progress": RunProgress.objects.filter(user_token="u", is_finished=False),
+        "evaluate: session by id": ResponseSession.objects.filter(id=1).select_related("doc", "run"),
+        "media: doc by id": InstructionDoc.objects.filter(pk=1).only("id", "file", "mime_type", "file_size"),
+        "evaluate: answers of session": Answer.objects.filter(session_id=1),
+        "done: sessions of run": ResponseSession.objects.filter(id__in=[1, 2, 3]).select_related("doc", "run"),
+        "start: least-covered docs": InstructionDoc.objects.filter(is_active=True)
+        .order_by("completed_count", "assigned_count")
+        .values_list("completed_count", "assigned_count")[4:5],
+        "start: least-covered videos (interleaved)": InstructionDoc.objects.filter(is_active=True, media_kind="video")
+        .order_by("completed_count", "assigned_count")
+        .values_list("completed_count", "assigned_count")[1:2],
+        "start: tied docs": InstructionDoc.objects.filter(is_active=True, completed_count=0, assigned_count=0),
+        "autosave: answers of session": Answer.objects.filter(session_id__in=[1], question_id__in=[1, 2]),
+        "summary: doc": RatingSummary.objects.filter(doc_id=1).select_related("question"),
+        "admin answers: by run": Answer.objects.filter(session__run_id=1).order_by("-id")[:100],
+        "admin answers: by doc": Answer.objects.filter(session__doc_id=1).order_by("-id")[:100],
+        "admin answers: by question": Answer.objects.filter(question_id=1).order_by("-id")[:100],
+        "admin answers: by rating": Answer.objects.filter(rating_int=3).order_by("-id")[:100],
+        "admin answers: keyset page": Answer.objects.filter(id__lt=1000).order_by("-id")[:100],
+        "admin answers: keyset page by doc": Answer.objects.filter(session__doc_id=1, id__lt=1000).order_by("-id")[:100],
+        "admin sessions: by doc": ResponseSession.objects.filter(doc_id=1).order_by("-id")[:100],
+        "admin sessions: by run": ResponseSession.objects.filter(run_id=1).order_by("-id")[:100],
+        "admin sessions: started since": ResponseSession.objects.filter(started_at__gte=since),
+        "admin runs: created since": EvaluationRun.objects.filter(created_at__gte=since),
+        "admin runs: by user token": EvaluationRun.objects.filter(user_token="u"),
+        "export: answers since": answer_rows_queryset(filter_answers(since=since)),
+        "changes: log page": ChangeLog.objects.filter(id__gt=1).order_by("id").values_list("id", "model", "object_id", "op")[:1000],
+    }
+
+
+def query_plan(qs) -> list[str]:
+    """SQLite EXPLAIN QUERY PLAN details of ``qs``."""
+    sql, params = qs.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan_rows):
+    # "SCAN t" without "USING ... INDEX" is a full table scan in SQLite's EXPLAIN QUERY PLAN.
+    return [detail for detail in plan_rows if detail.startswith("SCAN ") and " USING " not in detail]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN QUERY PLAN for each hot query and fail if any falls back to a full table scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            raise CommandError("check_query_plans reads SQLite EXPLAIN QUERY PLAN output")
+
+        failures = []
+        for name, qs in hot_queries().items():
+            plan = query_plan(qs)
+            scans = full_scans(plan)
+            if scans:
+                failures.append(f"{name}: {'; '.join(scans)}")
+            if opts["verbose_plans"] or scans:
+                self.stdout.write(f"{'FAIL' if scans else 'ok  '} {name}")
+                for detail in plan:
+                    self.stdout.write(f"       {detail}")
+
+        if failures:
+            raise CommandError("Full table scans in hot queries:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"All {len(hot_queries())} hot queries use indexes."))
@@ -0,0 +1,53 @@
+import sys
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from surveys.exports import WRITERS, answer_rows, filter_answers
+
+
+def _parse_when(value):
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise CommandError(f"Invalid date/datetime: {value}")
+        dt = datetime.combine(d, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+class Command(BaseCommand):
+    help = "Stream answers to CSV or JSON Lines in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--run", type=int, help="Only answers from this EvaluationRun id")
+        parser.add_argument("--doc", type=int, help="Only answers for this InstructionDoc id")
+        parser.add_argument("--since", help="Sessions started at or after this date/datetime")
+        parser.add_argument("--until", help="Sessions started before this date/datetime")
+
+    def handle(self, *args, **opts):
+        qs = filter_answers(
+            run=opts["run"],
+            doc=opts["doc"],
+            since=_parse_when(opts["since"]) if opts["since"] else None,
+            until=_parse_when(opts["until"]) if opts["until"] else None,
+        )
+        lines, _content_type = WRITERS[opts["format"]]
+
+        out = open(opts["output"], "w", encoding="utf-8", newline="") if opts["output"] else sys.stdout
+        count = -1 if opts["format"] == "csv" else 0
+        try:
+            for line in lines(answer_rows(qs)):
+                out.write(line)
+                count += 1
+        finally:
+            if opts["output"]:
+                out.close()
+        if opts["output"]:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} answers to {opts['output']}"))
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from surveys.changes import DEFAULT_LIMIT, MAX_LIMIT, available, iter_changes, latest_seq, prune
+
+
+def _read_state(path):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return int(fh.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        raise CommandError(f"{path} does not hold a sequence number")
+
+
+def _write_state(path, seq):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(f"{seq}\n")
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream answer/session/run changes after a sequence number as JSON Lines "
+        "(one upsert or delete per line) for incremental sync"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--after", type=int, help="Sequence number to start after (default 0)")
+        parser.add_argument(
+            "--state",
+            help="File holding the last exported sequence number; read before and updated after the export",
+        )
+        parser.add_argument("--batch", type=int, default=DEFAULT_LIMIT, help="Log entries per query")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--latest", action="store_true", help="Only print the newest sequence number")
+        parser.add_argument("--prune-through", type=int, help="Delete log entries up to this sequence number")
+
+    def handle(self, *args, **opts):
+        if not available():
+            raise CommandError("The change log is kept by SQLite triggers")
+        if opts["latest"]:
+            self.stdout.write(str(latest_seq()))
+            return
+        if opts["prune_through"] is not None:
+            n = prune(opts["prune_through"])
+            self.stdout.write(self.style.SUCCESS(f"Pruned {n} log entries"))
+            return
+        if not 1 <= opts["batch"] <= MAX_LIMIT:
+            raise CommandError(f"--batch must be between 1 and {MAX_LIMIT}")
+
+        after = opts["after"]
+        if after is None:
+            after = _read_state(opts["state"]) if opts["state"] else 0
+
+        out = open(opts["output"], "w", encoding="utf-8") if opts["output"] else sys.stdout
+        count, seq = 0, after
+        try:
+            for changes, seq in iter_changes(after, opts["batch"]):
+                out.writelines(json.dumps(c, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n" for c in changes)
+                count += len(changes)
+            out.flush()
+        finally:
+            if opts["output"]:
+                out.close()
+        # Only after the changes are written, so a failed run is simply repeated.
+        if opts["state"]:
+            _write_state(opts["state"], seq)
+        self.stderr.write(f"{count} changes after {after}, next {seq}")
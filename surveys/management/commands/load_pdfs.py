@@ -1,25 +1,159 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from django.core.management.base import BaseCommand, CommandError
+
+from django.conf import settings
 from django.core.files import File
-from surveys.models import InstructionDoc
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from surveys.ingest import MEDIA_FIELDS, inspect_media, is_mp4
+from surveys.models import ALLOWED_EXTS, VIDEO_EXTS, InstructionDoc
+
+
+def scan(directory: Path):
+    """Yield ``(path, size, mtime_ns)`` for ingestible files directly under ``directory``."""
+    exts = {"." + e for e in ALLOWED_EXTS}
+    with os.scandir(directory) as it:
+        for e in it:
+            if os.path.splitext(e.name)[1].lower() in exts and e.is_file():
+                st = e.stat()
+                yield os.path.abspath(e.path), st.st_size, st.st_mtime_ns
+
 
 class Command(BaseCommand):
-    help = "Load all PDFs from media/instructions as InstructionDoc entries"
+    help = (
+        "Incrementally load PDFs and videos as InstructionDoc entries. Files whose "
+        "size and mtime match the stored manifest are skipped without being read; "
+        "the rest are SHA-256 hashed in a process pool so renames and duplicate "
+        "content are detected. MP4s are stored with moov in front: files under "
+        "MEDIA_ROOT are rewritten in place, files elsewhere are never modified."
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument("directory", nargs="?", default="media/instructions")
+        parser.add_argument(
+            "directories", nargs="*",
+            help="Directories to scan (default: MEDIA_ROOT/instructions and MEDIA_ROOT/videos)",
+        )
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes")
 
     def handle(self, *args, **opts):
-        directory = Path(opts["directory"]).resolve()
-        if not directory.exists():
-            raise CommandError(f"Directory not found: {directory}")
-        count = 0
-        for p in directory.glob("*.pdf"):
-            obj, created = InstructionDoc.objects.get_or_create(title=p.stem)
-            if created or not obj.file:
-                with p.open("rb") as fh:
-                    obj.file.save(p.name, File(fh), save=True)
-            obj.is_active = True
-            obj.save()
-            count += 1
-        self.stdout.write(self.style.SUCCESS(f"Loaded {count} PDFs from {directory}"))
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        if opts["directories"]:
+            directories = [Path(d).resolve() for d in opts["directories"]]
+            for d in directories:
+                if not d.is_dir():
+                    raise CommandError(f"Directory not found: {d}")
+        else:
+            directories = [d for d in (Path(media_root, "instructions"), Path(media_root, "videos")) if d.is_dir()]
+            if not directories:
+                raise CommandError(f"No instructions/ or videos/ directory under {media_root}")
+
+        t0 = time.perf_counter()
+        files = [f for d in directories for f in scan(d)]
+
+        docs = list(InstructionDoc.objects.only("id", "title", "file", "is_active", "ocr_status", *MEDIA_FIELDS))
+        by_path = {}
+        by_hash = {}
+        for doc in docs:
+            if doc.file.name:
+                by_path[os.path.join(media_root, doc.file.name)] = doc
+            if doc.content_hash:
+                by_hash.setdefault(doc.content_hash, doc)
+
+        changed = {}
+        unchanged = 0
+        to_hash = []
+        for path, size, mtime_ns in files:
+            doc = by_path.get(path)
+            if (
+                doc is not None and doc.content_hash and doc.file_size == size and doc.file_mtime_ns == mtime_ns
+                and not (is_mp4(path) and not doc.box_layout)
+            ):
+                unchanged += 1
+                if not doc.is_active:
+                    doc.is_active = True
+                    changed[doc.pk] = doc
+                continue
+            to_hash.append((path, size, mtime_ns))
+
+        paths = [f[0] for f in to_hash]
+        # Sources outside MEDIA_ROOT are left alone: their faststart copy is
+        # staged here and becomes the stored file.
+        os.makedirs(media_root, exist_ok=True)
+        stage_dir = tempfile.mkdtemp(prefix=".load_pdfs-", dir=media_root)
+        stage = [None if self.inside(p, media_root) else stage_dir for p in paths]
+        try:
+            if opts["workers"] > 1 and len(paths) > 1:
+                with ProcessPoolExecutor(max_workers=opts["workers"]) as pool:
+                    chunksize = max(1, len(paths) // (opts["workers"] * 4))
+                    results = list(pool.map(inspect_media, paths, stage, chunksize=chunksize))
+            else:
+                results = [inspect_media(p, d) for p, d in zip(paths, stage)]
+
+            created = []
+            renamed = duplicates = updated = rewritten = 0
+            for path, (fields, written) in zip(paths, results):
+                staged = written if written and written != path else None
+                rewritten += written == path
+                digest = fields["content_hash"]
+                doc = by_path.get(path)
+                if doc is None:
+                    known = by_hash.get(digest)
+                    if known is not None and os.path.exists(os.path.join(media_root, known.file.name)):
+                        duplicates += 1
+                        continue
+                    if known is None:
+                        doc = InstructionDoc(title=Path(path).stem)
+                        created.append(doc)
+                    else:
+                        # Same content, old file gone: the file was renamed or moved.
+                        renamed += 1
+                        doc = known
+                    doc.file.name = self.store(path, media_root, staged)
+                    if staged:
+                        rewritten += 1
+                    if not self.inside(path, media_root):
+                        st = os.stat(os.path.join(media_root, doc.file.name))
+                        fields.update(file_size=st.st_size, file_mtime_ns=st.st_mtime_ns)
+                elif doc.content_hash != digest or doc.file_size is None:
+                    updated += 1
+                if doc.content_hash != digest:
+                    doc.ocr_status = "pending"
+                for field, value in fields.items():
+                    setattr(doc, field, value)
+                doc.is_active = True
+                by_hash.setdefault(digest, doc)
+                if doc.pk is not None:
+                    changed[doc.pk] = doc
+        finally:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+
+        with transaction.atomic():
+            InstructionDoc.objects.bulk_create(created, batch_size=500)
+            InstructionDoc.objects.bulk_update(
+                list(changed.values()), ["file", "is_active", "ocr_status", *MEDIA_FIELDS], batch_size=500,
+            )
+
+        elapsed = time.perf_counter() - t0
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {len(files)} files in {elapsed:.2f}s: {len(created)} new, {updated} updated, "
+            f"{renamed} renamed, {duplicates} duplicate, {unchanged} unchanged ({len(paths)} hashed, "
+            f"{rewritten} MP4s moved to faststart)"
+        ))
+
+    @staticmethod
+    def inside(path: str, media_root: str) -> bool:
+        return os.path.commonpath([path, media_root]) == media_root
+
+    def store(self, path: str, media_root: str, staged: str | None = None) -> str:
+        """Storage name for ``path``; files outside MEDIA_ROOT are copied in (from ``staged`` if given)."""
+        if self.inside(path, media_root):
+            return os.path.relpath(path, media_root).replace(os.sep, "/")
+        subdir = "videos/" if os.path.splitext(path)[1].lower() in VIDEO_EXTS else "instructions/"
+        with open(staged or path, "rb") as fh:
+            return default_storage.save(subdir + os.path.basename(path), File(fh))
@@ -0,0 +1,257 @@
+import http.cookiejar
+import json
+import platform
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.urls import Resolver404, resolve
+
+_QUESTION_RE = re.compile(r'name="rating_(\d+)"')
+_SAVE_URL_RE = re.compile(r'"(/api/save/\d+/)"')
+_CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class InProcessTransport:
+    """Drives the Django handler directly through a per-participant test Client."""
+
+    def __init__(self):
+        from django.test import Client
+
+        hosts = [h for h in settings.ALLOWED_HOSTS if h != "*"]
+        host = hosts[0].lstrip(".") if hosts else "testserver"
+        self.client = Client(HTTP_HOST=host)
+
+    def request(self, method, path, data=None, json_body=None, csrf=None):
+        if json_body is not None:
+            resp = self.client.generic(method, path, json.dumps(json_body), content_type="application/json")
+        elif method == "POST":
+            resp = self.client.post(path, data or {})
+        else:
+            resp = self.client.get(path)
+        body = b"".join(resp.streaming_content) if resp.streaming else resp.content
+        return resp.status_code, resp.headers.get("Location", ""), body.decode("utf-8", "replace")
+
+    def csrf_token(self):
+        cookie = self.client.cookies.get(settings.CSRF_COOKIE_NAME)
+        return cookie.value if cookie else ""
+
+    def close(self):
+        connection.close()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTransport:
+    """Talks to a running server; redirects are followed by the script so each hop is timed."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar), _NoRedirect())
+
+    def request(self, method, path, data=None, json_body=None, csrf=None):
+        headers = {"Referer": self.base_url + "/"}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        elif method == "POST":
+            body = urllib.parse.urlencode(data or {}).encode("utf-8")
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        if csrf:
+            headers["X-CSRFToken"] = csrf
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                return resp.status, resp.headers.get("Location", ""), resp.read().decode("utf-8", "replace")
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.headers.get("Location", ""), exc.read().decode("utf-8", "replace")
+
+    def csrf_token(self):
+        for cookie in self.jar:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        return ""
+
+    def close(self):
+        pass
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, ok):
+        with self._lock:
+            self.samples[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+
+def _csrf(body):
+    m = _CSRF_RE.search(body)
+    return m[1] if m else ""
+
+
+def _url_name(path):
+    try:
+        match = resolve(urllib.parse.urlsplit(path).path)
+    except Resolver404:
+        return path
+    return match.view_name
+
+
+def _percentiles(values):
+    if len(values) < 2:
+        v = values[0] if values else 0.0
+        return v, v, v
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return q[49], q[94], q[98]
+
+
+class Participant:
+    """One virtual participant walking home → start → evaluate/1..N (+ autosaves) → done → thanks."""
+
+    def __init__(self, transport, recorder, autosaves):
+        self.t = transport
+        self.rec = recorder
+        self.autosaves = autosaves
+
+    def call(self, method, path, expect, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            status, location, body = self.t.request(method, path, **kwargs)
+        except Exception:
+            self.rec.add(_url_name(path), time.perf_counter() - t0, False)
+            raise
+        self.rec.add(_url_name(path), time.perf_counter() - t0, status == expect)
+        if status != expect:
+            raise RuntimeError(f"{method} {path} -> {status}")
+        return location, body
+
+    def form_data(self, body, questions, n):
+        data = {"csrfmiddlewaretoken": _csrf(body)}
+        for qid in questions:
+            data[f"rating_{qid}"] = str((n + int(qid)) % 7 + 1)
+            data[f"reason_{qid}"] = "Load test reason text"
+            data[f"improve_{qid}"] = "Load test improvement"
+        return data
+
+    def run(self):
+        _, body = self.call("GET", "/", 200)
+        location, _ = self.call("POST", "/start", 302, data={"csrfmiddlewaretoken": _csrf(body)})
+        step = 0
+        while "/evaluate/" in location:
+            step += 1
+            path = urllib.parse.urlsplit(location).path
+            _, body = self.call("GET", path, 200)
+            questions = _QUESTION_RE.findall(body)
+            save_url = _SAVE_URL_RE.search(body)
+            for n in range(self.autosaves if save_url else 0):
+                qid = questions[n % len(questions)]
+                self.call(
+                    "POST", save_url[1], 200,
+                    json_body={"answers": {qid: {"rating": n % 7 + 1, "reason": f"draft {n}"}}},
+                    csrf=self.t.csrf_token(),
+                )
+            location, _ = self.call("POST", path, 302, data=self.form_data(body, questions, step))
+        _, body = self.call("GET", "/done", 200)
+        self.call("POST", "/done", 302, data={"csrfmiddlewaretoken": _csrf(body)})
+        self.call("GET", "/thanks/", 200)
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent participants walking the full evaluation flow and "
+        "report per-URL latency percentiles, throughput and error rates"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--participants", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, help="Simultaneous participants (default: all)")
+        parser.add_argument("--autosaves", type=int, default=3, help="Autosave calls per step")
+        parser.add_argument("--url", help="Base URL of a running server (default: in-process WSGI handler)")
+        parser.add_argument("--output", "-o", help="Write the JSON report here")
+
+    def handle(self, *args, **opts):
+        if opts["participants"] < 1:
+            raise CommandError("--participants must be at least 1")
+        recorder = Recorder()
+        failures = []
+
+        def one(_):
+            transport = HttpTransport(opts["url"]) if opts["url"] else InProcessTransport()
+            try:
+                Participant(transport, recorder, opts["autosaves"]).run()
+            except Exception as exc:
+                failures.append(str(exc))
+            finally:
+                transport.close()
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"] or opts["participants"]) as pool:
+            list(pool.map(one, range(opts["participants"])))
+        elapsed = time.perf_counter() - t0
+
+        urls = {}
+        for name, values in sorted(recorder.samples.items()):
+            p50, p95, p99 = _percentiles(values)
+            urls[name] = {
+                "requests": len(values),
+                "errors": recorder.errors[name],
+                "error_rate": recorder.errors[name] / len(values),
+                "p50_ms": round(p50 * 1000, 2),
+                "p95_ms": round(p95 * 1000, 2),
+                "p99_ms": round(p99 * 1000, 2),
+            }
+        total = sum(u["requests"] for u in urls.values())
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "target": opts["url"] or "in-process",
+            "participants": opts["participants"],
+            "concurrency": opts["concurrency"] or opts["participants"],
+            "autosaves_per_step": opts["autosaves"],
+            "completed": opts["participants"] - len(failures),
+            "failures": failures[:20],
+            "elapsed_s": round(elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "participants_per_s": round((opts["participants"] - len(failures)) / elapsed, 2) if elapsed else 0.0,
+            "urls": urls,
+            "environment": {
+                "python": platform.python_version(),
+                "database": connections["default"].vendor,
+                "sqlite_production": getattr(settings, "SQLITE_PRODUCTION", False),
+                "autosave_coalesce": getattr(settings, "AUTOSAVE_COALESCE", False),
+            },
+        }
+
+        self.stdout.write(f"{'url':40} {'reqs':>6} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, u in urls.items():
+            self.stdout.write(
+                f"{name:40} {u['requests']:>6} {u['error_rate'] * 100:>5.1f}% "
+                f"{u['p50_ms']:>7.1f}ms {u['p95_ms']:>7.1f}ms {u['p99_ms']:>7.1f}ms"
+            )
+        self.stdout.write(
+            f"{report['completed']}/{opts['participants']} participants, {total} requests in "
+            f"{elapsed:.2f}s ({report['throughput_rps']} req/s)"
+        )
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {opts['output']}"))
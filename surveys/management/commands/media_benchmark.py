@@ -0,0 +1,201 @@
+import asyncio
+import gc
+import json
+import os
+import secrets
+import statistics
+import threading
+import time
+import tracemalloc
+import warnings
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from surveys.media import video_table
+
+MiB = 1024 * 1024
+
+
+class SlowClient:
+    """One ASGI connection that drains the body at ``rate`` bytes/s."""
+
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.rate = rate
+        self.status = None
+        self.received = 0
+        self.ttfb = None
+        self.finished = None
+        self._sent_request = False
+        self._t0 = None
+
+    async def receive(self):
+        if not self._sent_request:
+            self._sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.ttfb = time.perf_counter() - self._t0
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            self.received += len(body)
+            if body:
+                await asyncio.sleep(len(body) / self.rate)
+            if not message.get("more_body", False):
+                self.finished = time.perf_counter() - self._t0
+
+    async def run(self, app):
+        self._t0 = time.perf_counter()
+        await app(self.scope, self.receive, self.send)
+
+
+def _scope(path, host, range_header):
+    headers = [(b"host", host.encode())]
+    if range_header:
+        headers.append((b"range", range_header.encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": (host, 80),
+    }
+
+
+def _pct(values, q):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def _run_streams(app, n, path, host, range_header, rate):
+    clients = [SlowClient(_scope(path, host, range_header), rate) for _ in range(n)]
+    peak_threads = threading.active_count()
+    done = asyncio.Event()
+
+    async def sample():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.02)
+
+    sampler = asyncio.create_task(sample())
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(c.run(app) for c in clients), return_exceptions=True)
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await sampler
+    errors = sum(1 for r in results if isinstance(r, Exception))
+    return clients, elapsed, peak_threads, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold N simultaneous slow-client video streams through the in-process ASGI "
+        "application and compare the async media path with the sync FileResponse path"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--streams", default="50,200", help="Comma-separated stream counts to try")
+        parser.add_argument("--mode", choices=["both", "async", "sync"], default="both")
+        parser.add_argument("--filename", help="Existing file in MEDIA_ROOT/videos (default: generate one)")
+        parser.add_argument("--size-mb", type=float, default=8, help="Size of the generated video file")
+        parser.add_argument("--range", dest="range_header", default="", help='Range header to send, e.g. "bytes=0-4194303"')
+        parser.add_argument("--client-mbps", type=float, default=16, help="Per-client drain rate in megabits/s")
+        parser.add_argument("--output", "-o", help="Write the JSON report here")
+
+    def handle(self, *args, **opts):
+        try:
+            counts = [int(n) for n in opts["streams"].split(",") if n.strip()]
+        except ValueError:
+            raise CommandError("--streams must be comma-separated integers")
+        if not counts or min(counts) < 1:
+            raise CommandError("--streams must be positive")
+
+        generated = None
+        filename = opts["filename"]
+        if not filename:
+            filename = f"_bench_{secrets.token_hex(4)}.mp4"
+            generated = os.path.join(video_table.directory, filename)
+            os.makedirs(video_table.directory, exist_ok=True)
+            with open(generated, "wb") as fh:
+                remaining = int(opts["size_mb"] * MiB)
+                while remaining > 0:
+                    chunk = os.urandom(min(MiB, remaining))
+                    fh.write(chunk)
+                    remaining -= len(chunk)
+        video_table.invalidate()
+        if video_table.get(filename) is None:
+            raise CommandError(f"{filename} not found in {video_table.directory}")
+
+        hosts = [h for h in settings.ALLOWED_HOSTS if h != "*"]
+        host = hosts[0].lstrip(".") if hosts else "testserver"
+        path = f"/stream/video/{filename}"
+        rate = opts["client_mbps"] * 1_000_000 / 8
+        modes = ["sync", "async"] if opts["mode"] == "both" else [opts["mode"]]
+
+        rows = []
+        tracemalloc.start()
+        try:
+            for mode in modes:
+                for n in counts:
+                    with override_settings(MEDIA_ASYNC_STREAMING=(mode == "async")), warnings.catch_warnings():
+                        # The sync path under ASGI warns that Django buffers the iterator.
+                        warnings.simplefilter("ignore")
+                        app = ASGIHandler()
+                        gc.collect()
+                        baseline = tracemalloc.get_traced_memory()[0]
+                        tracemalloc.reset_peak()
+                        clients, elapsed, peak_threads, errors = asyncio.run(
+                            _run_streams(app, n, path, host, opts["range_header"], rate)
+                        )
+                    peak_mem = tracemalloc.get_traced_memory()[1] - baseline
+                    ok = [c for c in clients if c.status in (200, 206) and c.finished is not None]
+                    ttfb = [c.ttfb for c in clients if c.ttfb is not None]
+                    rows.append({
+                        "mode": mode,
+                        "streams": n,
+                        "completed": len(ok),
+                        "errors": n - len(ok),
+                        "elapsed_s": round(elapsed, 3),
+                        "ttfb_p50_ms": round(_pct(ttfb, 50) * 1000, 1),
+                        "ttfb_p99_ms": round(_pct(ttfb, 99) * 1000, 1),
+                        "peak_threads": peak_threads,
+                        "peak_python_mib": round(peak_mem / MiB, 1),
+                        "throughput_mib_s": round(sum(c.received for c in clients) / MiB / elapsed, 1) if elapsed else 0.0,
+                    })
+        finally:
+            tracemalloc.stop()
+            if generated:
+                os.remove(generated)
+                video_table.invalidate()
+
+        self.stdout.write(
+            f"{'mode':6} {'streams':>7} {'done':>5} {'ttfb p50':>9} {'ttfb p99':>9} "
+            f"{'threads':>7} {'peak MiB':>9} {'MiB/s':>7} {'wall':>7}"
+        )
+        for r in rows:
+            self.stdout.write(
+                f"{r['mode']:6} {r['streams']:>7} {r['completed']:>5} {r['ttfb_p50_ms']:>7.1f}ms "
+                f"{r['ttfb_p99_ms']:>7.1f}ms {r['peak_threads']:>7} {r['peak_python_mib']:>9.1f} "
+                f"{r['throughput_mib_s']:>7.1f} {r['elapsed_s']:>6.2f}s"
+            )
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as fh:
+                json.dump({"file": filename, "client_mbps": opts["client_mbps"], "runs": rows}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {opts['output']}"))
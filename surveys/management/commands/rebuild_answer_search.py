@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+from surveys.search import FTS_TABLE, available
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the FTS5 answer search index from surveys_answer. Migration 0012 "
+        "builds it and triggers keep it current; use this to repair or --check it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--optimize", action="store_true", help="Merge the index b-trees after rebuilding")
+        parser.add_argument("--check", action="store_true", help="Only run the FTS5 integrity check")
+
+    def handle(self, *args, **opts):
+        if not available():
+            raise CommandError("The answer search index needs SQLite FTS5")
+
+        t0 = time.perf_counter()
+        with connection.cursor() as cursor:
+            if opts["check"]:
+                try:
+                    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+                except DatabaseError as exc:
+                    raise CommandError(f"Answer search index is out of date ({exc}); rebuild it") from exc
+                self.stdout.write(self.style.SUCCESS("Answer search index matches surveys_answer."))
+                return
+            with transaction.atomic():
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            if opts["optimize"]:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute("SELECT COUNT(*) FROM surveys_answer")
+            (count,) = cursor.fetchone()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} answers in {time.perf_counter() - t0:.2f}s."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from surveys.stats import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-document, per-question rating summary table from all answers"
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_rating_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rating summaries."))
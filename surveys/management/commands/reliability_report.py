@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.reliability import DEFAULT_BOOTSTRAP, NumpyMissing, reliability_report
+
+
+def _fmt(value):
+    return "   -  " if value is None else f"{value:6.3f}"
+
+
+def _fmt_ci(ci):
+    return "       -        " if ci is None else f"[{ci[0]:6.3f}, {ci[1]:6.3f}]"
+
+
+class Command(BaseCommand):
+    help = (
+        "Inter-rater reliability per question: ordinal Krippendorff's alpha, ICC(1) and ICC(1,k) "
+        "with bootstrap CIs, plus per-document agreement"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bootstrap", type=int, default=DEFAULT_BOOTSTRAP, help="Resamples for the CIs (0 = none)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--docs", action="store_true", help="Also print per-document alpha and r_wg")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        try:
+            report = reliability_report(bootstrap=max(0, opts["bootstrap"]), seed=opts["seed"])
+        except NumpyMissing as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - t0
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['raters']} runs rated {report['docs_rated']} documents "
+            f"({report['bootstrap']} bootstrap resamples, {elapsed:.2f}s)\n"
+        )
+        self.stdout.write(f"{'dimension':<24} {'docs':>5} {'alpha':>6} {'95% CI':^16} {'ICC1':>6} {'95% CI':^16} {'ICC1k':>6}")
+        for row in report["dimensions"] + [{"key": "(all)", **report["overall"]}]:
+            self.stdout.write(
+                f"{row['key']:<24} {row['units']:>5} {_fmt(row['alpha'])} {_fmt_ci(row['alpha_ci'])} "
+                f"{_fmt(row['icc1'])} {_fmt_ci(row['icc1_ci'])} {_fmt(row['icc1k'])}"
+            )
+
+        if opts["docs"]:
+            keys = [d["key"] for d in report["dimensions"]]
+            self.stdout.write(f"\n{'doc':>6} {'raters':>6} {'alpha':>6}  r_wg by dimension ({', '.join(keys)})")
+            for doc in report["docs"]:
+                rwg = " ".join(_fmt(doc["dimensions"][k]["rwg"]) for k in keys)
+                self.stdout.write(f"{doc['doc']:>6} {doc['raters']:>6} {_fmt(doc['alpha'])}  {rwg}")
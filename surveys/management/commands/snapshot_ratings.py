@@ -0,0 +1,159 @@
+import os
+import shutil
+import time
+from datetime import datetime, timezone as dt_timezone
+from itertools import chain
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from surveys.models import Answer, Question, ResponseSession
+from surveys.stats import RATINGS
+
+try:
+    import numpy as np
+
+    from surveys import snapshot
+except ImportError:  # optional, like the reliability report
+    np = snapshot = None
+
+# Sessions finishing up to this long before the watermark are re-checked, so
+# a done() that commits after a snapshot ran is still picked up.
+SETTLE_SECONDS = 300
+
+
+def _positions(keys, values):
+    """Index of each of ``values`` in ``keys`` and whether it is there at all."""
+    if not len(keys):
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    order = np.argsort(keys)
+    pos = order[np.searchsorted(keys, values, sorter=order).clip(max=len(keys) - 1)]
+    return pos, keys[pos] == values
+
+
+class Command(BaseCommand):
+    help = (
+        "Append finished sessions to a memory-mappable rating snapshot (int8 ratings by "
+        "session × question plus run/doc/user side tables) for offline analysis"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--out",
+            default=os.path.join(settings.BASE_DIR, "snapshots", "ratings"),
+            help="Snapshot directory (default: snapshots/ratings)",
+        )
+        parser.add_argument("--rebuild", action="store_true", help="Write a fresh snapshot instead of appending")
+
+    def handle(self, *args, **opts):
+        if np is None:
+            raise CommandError("snapshot_ratings needs NumPy: pip install numpy")
+        path = os.path.abspath(opts["out"])
+        t0 = time.perf_counter()
+        if opts["rebuild"]:
+            tmp = path + ".new"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            added = self.append(tmp, None)
+            old = path + ".old"
+            if os.path.exists(path):
+                os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.makedirs(path, exist_ok=True)
+            try:
+                manifest = snapshot.read_manifest(path)
+            except snapshot.SnapshotError as exc:
+                raise CommandError(f"{exc}; run with --rebuild")
+            added = self.append(path, manifest)
+
+        rows = snapshot.read_manifest(path)["rows"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {path}: {added} sessions added, {rows} total, {time.perf_counter() - t0:.2f}s"
+        ))
+
+    def append(self, path, manifest):
+        """Append the sessions finished since the manifest's watermark to ``path``; returns how many."""
+        if manifest is None:
+            columns = [{"id": qid, "key": key} for qid, key in Question.objects.order_by("id").values_list("id", "key")]
+            manifest = {
+                "format": snapshot.FORMAT_VERSION,
+                "questions": columns,
+                "rows": 0,
+                "users": 0,
+                "users_bytes": 0,
+                "watermark": None,
+            }
+
+        sessions = ResponseSession.objects.filter(finished_at__isnull=False)
+        answers = Answer.objects.filter(session__finished_at__isnull=False)
+        since = None
+        if manifest["watermark"] is not None:
+            since = manifest["watermark"] - SETTLE_SECONDS
+            cutoff = datetime.fromtimestamp(since, tz=dt_timezone.utc)
+            sessions = sessions.filter(finished_at__gte=cutoff)
+            answers = answers.filter(session__finished_at__gte=cutoff)
+
+        found = list(sessions.order_by("finished_at", "id").values_list("id", "run_id", "doc_id", "user_token", "finished_at"))
+        ids = np.fromiter((s[0] for s in found), dtype=np.int64, count=len(found))
+        old_snap = snapshot.load(path) if manifest["rows"] else None
+        if old_snap is not None and found:
+            old = old_snap.sessions
+            recent = old["session"][old["finished"] >= since]
+            keep = ~np.isin(ids, recent)
+            found = [s for s, k in zip(found, keep) if k]
+            ids = ids[keep]
+        if not found:
+            if manifest["rows"] == 0:
+                # Empty but loadable, so readers need no special case.
+                q = len(manifest["questions"])
+                np.save(os.path.join(path, snapshot.RATINGS_FILE), np.zeros((0, q), dtype=np.int8))
+                np.save(os.path.join(path, snapshot.SESSIONS_FILE), np.zeros(0, dtype=snapshot.SESSION_DTYPE))
+                snapshot.write_manifest(path, manifest)
+            return 0
+
+        users = {}
+        if old_snap is not None:
+            users = {u: i for i, u in enumerate(snapshot.load_users(old_snap))}
+        new_users = []
+        records = np.zeros(len(found), dtype=snapshot.SESSION_DTYPE)
+        for i, (sid, run_id, doc_id, token, finished) in enumerate(found):
+            token = (token or "").replace("\n", " ")
+            if token not in users:
+                users[token] = len(users)
+                new_users.append(token)
+            records[i] = (sid, run_id or 0, doc_id, users[token], int(finished.timestamp()))
+
+        # Answers of the new sessions into (row, column) cells.
+        answer_rows = answers.values_list("session_id", "question_id", "rating_int")
+        cells = np.fromiter(chain.from_iterable(answer_rows), dtype=np.int64).reshape(-1, 3)
+        row, ours = _positions(ids, cells[:, 0])
+        cells, row = cells[ours], row[ours]
+        qids = np.array([q["id"] for q in manifest["questions"]], dtype=np.int64)
+        col, known = _positions(qids, cells[:, 1])
+        if not known.all():
+            unknown = sorted(set(cells[~known, 1].tolist()))
+            raise CommandError(f"Questions {unknown} are not columns of this snapshot; run with --rebuild")
+        ratings = np.zeros((len(found), len(qids)), dtype=np.int8)
+        valid = (cells[:, 2] >= RATINGS[0]) & (cells[:, 2] <= RATINGS[-1])
+        ratings[row[valid], col[valid]] = cells[valid, 2]
+
+        committed = manifest["rows"]
+        snapshot.append_rows(os.path.join(path, snapshot.RATINGS_FILE), ratings, committed)
+        snapshot.append_rows(os.path.join(path, snapshot.SESSIONS_FILE), records, committed)
+        with open(os.path.join(path, snapshot.USERS_FILE), "ab") as fh:
+            fh.truncate(manifest["users_bytes"])
+            fh.write("".join(u + "\n" for u in new_users).encode("utf-8"))
+            users_bytes = fh.tell()
+
+        manifest.update(
+            rows=committed + len(found),
+            users=len(users),
+            users_bytes=users_bytes,
+            watermark=max(int(records["finished"].max()), manifest["watermark"] or 0),
+            updated_at=timezone.now().isoformat(),
+        )
+        snapshot.write_manifest(path, manifest)
+        return len(found)
@@ -0,0 +1,424 @@
+# surveys/media.py
+import asyncio
+import os
+import re
+import secrets
+import threading
+import time
+from collections import deque, namedtuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .mediatypes import VIDEO_EXTS, guess_mime
+
+MIN_BLOCK_SIZE = 64 * 1024
+MAX_BLOCK_SIZE = 1024 * 1024
+MAX_RANGES = 16
+# Blocks are held in memory while queued for a slow ASGI client.
+ASYNC_MAX_BLOCK_SIZE = 256 * 1024
+
+_RANGE_SPEC_RE = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def file_etag(st) -> str:
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def block_size_for(length: int) -> int:
+    """Small reads for probing requests, up to 1 MiB for long sequential transfers."""
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, length // 8))
+
+
+def parse_ranges(header: str, size: int):
+    """
+    Parse a ``bytes=`` Range header into sorted, coalesced inclusive ``(start, end)`` pairs.
+
+    Returns None when the header is absent or should be ignored (malformed, not
+    bytes, or more than MAX_RANGES specs), and raises RangeNotSatisfiable when
+    no spec overlaps the representation (RFC 7233 §4.4).
+    """
+    unit, _, specs = (header or "").partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+    specs = specs.split(",")
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        m = _RANGE_SPEC_RE.match(spec)
+        if not m:
+            return None
+        first, last = m.groups()
+        if not first:
+            if not last:
+                return None
+            suffix = int(last)
+            if suffix > 0 and size > 0:
+                ranges.append((max(0, size - suffix), size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            end = int(last) if last else size - 1
+            ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        prev_start, prev_end = merged[-1]
+        if start <= prev_end + 1:
+            merged[-1] = (prev_start, max(prev_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(request, etag: str, last_modified: int) -> bool:
+    if_range = request.META.get("HTTP_IF_RANGE", "").strip()
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+class RangeFile:
+    """
+    Read-limited view of ``f`` over ``[start, start + length)``.
+
+    ``fileno()`` is kept so a server's wsgi.file_wrapper can still sendfile()
+    from the current offset, capped by the response Content-Length.
+    """
+
+    def __init__(self, f, start: int, length: int):
+        f.seek(start)
+        self._f = f
+        self._remaining = length
+
+    def fileno(self):
+        return self._f.fileno()
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+
+MediaEntry = namedtuple("MediaEntry", ["path", "stat", "content_type"])
+
+
+class MediaTable:
+    """
+    Cached listing of one media directory: filename -> MediaEntry.
+
+    The directory is rescanned at most once every ``MEDIA_STAT_TTL`` seconds,
+    so hot requests resolve a file with a dict lookup instead of stat() calls.
+    """
+
+    def __init__(self, subdir: str, exts: tuple[str, ...]):
+        self.subdir = subdir
+        self.exts = exts
+        self._entries: dict[str, MediaEntry] = {}
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(settings.MEDIA_ROOT, self.subdir)
+
+    def _scan(self) -> dict[str, MediaEntry]:
+        entries = {}
+        try:
+            it = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries
+        with it:
+            for e in it:
+                ext = os.path.splitext(e.name)[1].lower()
+                if ext not in self.exts or not e.is_file():
+                    continue
+                ctype = guess_mime(e.name)
+                entries[e.name] = MediaEntry(e.path, e.stat(), ctype)
+        return entries
+
+    def get(self, name: str):
+        if time.monotonic() >= self._expires:
+            with self._lock:
+                if time.monotonic() >= self._expires:
+                    self._entries = self._scan()
+                    self._expires = time.monotonic() + settings.MEDIA_STAT_TTL
+        return self._entries.get(name)
+
+    def invalidate(self):
+        self._expires = 0.0
+
+
+video_table = MediaTable("videos", VIDEO_EXTS)
+
+
+def offload_response(path: str, content_type: str, filename: str) -> HttpResponse:
+    """Hand the transfer to the fronting proxy; it owns ranges and validators."""
+    resp = HttpResponse(content_type=content_type)
+    if settings.MEDIA_OFFLOAD == "x-accel-redirect":
+        rel = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, "/")
+        resp["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(rel)
+    else:
+        resp["X-Sendfile"] = path
+    resp["Content-Disposition"] = content_disposition_header(False, filename)
+    return resp
+
+
+def _multipart_parts(ranges, size: int, content_type: str, boundary: str):
+    heads = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode("ascii")
+        for start, end in ranges
+    ]
+    tail = f"--{boundary}--\r\n".encode("ascii")
+    length = sum(len(h) + (end - start + 1) + 2 for h, (start, end) in zip(heads, ranges)) + len(tail)
+    return heads, tail, length
+
+
+def _multipart_body(f, ranges, heads, tail, block_size: int):
+    with f:
+        for head, (start, end) in zip(heads, ranges):
+            yield head
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(block_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+            yield b"\r\n"
+        yield tail
+
+
+_Transfer = namedtuple("_Transfer", ["status", "body_type", "headers", "ranges", "length", "parts"])
+
+
+def _prepare(request, path: str, content_type: str, filename: str, st):
+    """Validators, conditional requests and ranges; returns a finished response or a _Transfer."""
+    if st is None:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise Http404("File not found")
+    size = st.st_size
+
+    etag = file_etag(st)
+    last_modified = int(st.st_mtime)
+    validators = {"Accept-Ranges": "bytes", "ETag": etag, "Last-Modified": http_date(last_modified)}
+    resp = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if resp is not None:
+        for k, v in validators.items():
+            resp[k] = v
+        return resp
+
+    ranges = None
+    if if_range_matches(request, etag, last_modified):
+        try:
+            ranges = parse_ranges(request.META.get("HTTP_RANGE", ""), size)
+        except RangeNotSatisfiable:
+            resp = HttpResponse(status=416)
+            resp["Content-Range"] = f"bytes */{size}"
+            resp["Accept-Ranges"] = "bytes"
+            return resp
+
+    status = 206 if ranges else 200
+    headers = {**validators, "Content-Disposition": content_disposition_header(False, filename)}
+    parts = None
+    if ranges and len(ranges) > 1:
+        boundary = secrets.token_hex(12)
+        heads, tail, length = _multipart_parts(ranges, size, content_type, boundary)
+        parts = (heads, tail)
+        body_type = f"multipart/byteranges; boundary={boundary}"
+    else:
+        body_type = content_type
+        if ranges:
+            start, end = ranges[0]
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            length = end - start + 1
+        else:
+            ranges = [(0, size - 1)] if size else []
+            length = size
+    headers["Content-Length"] = str(length)
+    return _Transfer(status, body_type, headers, ranges, length, parts)
+
+
+def serve_file(request, path: str, content_type: str, *, filename: str | None = None, st=None):
+    """
+    Serve ``path`` with strong validators and RFC 7233 byte ranges.
+
+    Single ranges and full bodies go out through FileResponse, so
+    wsgi.file_wrapper/sendfile is used when the server provides it instead of
+    buffering the file in the worker. Several ranges produce a
+    multipart/byteranges body. ``st`` may be passed from a MediaTable to skip
+    the stat() call.
+    """
+    filename = filename or os.path.basename(path)
+    if settings.MEDIA_OFFLOAD:
+        return offload_response(path, content_type, filename)
+
+    t = _prepare(request, path, content_type, filename, st)
+    if isinstance(t, HttpResponseBase):
+        return t
+    if request.method == "HEAD":
+        return HttpResponse(status=t.status, content_type=t.body_type, headers=t.headers)
+
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise Http404("File not found")
+    block_size = block_size_for(t.length)
+
+    if t.parts:
+        heads, tail = t.parts
+        resp = StreamingHttpResponse(
+            _multipart_body(f, t.ranges, heads, tail, block_size),
+            status=t.status,
+            content_type=t.body_type,
+        )
+    elif t.status == 206:
+        resp = FileResponse(RangeFile(f, t.ranges[0][0], t.length), status=t.status, content_type=t.body_type)
+    else:
+        resp = FileResponse(f, status=t.status, content_type=t.body_type)
+    resp.block_size = block_size
+    for k, v in t.headers.items():
+        resp[k] = v
+    return resp
+
+
+class AsyncFileStream:
+    """
+    Async iterator over byte ``spans`` of ``f`` for ASGI responses.
+
+    ``spans`` mixes literal ``bytes`` (multipart heads) with inclusive
+    ``(start, end)`` ranges. Blocks are read in the default executor with at
+    most ``read_ahead`` reads queued ahead of the client; when the server's
+    send() applies backpressure iteration pauses and no further reads are
+    issued, so a slow client holds a few blocks of memory and no thread.
+    """
+
+    def __init__(self, f, spans, block_size: int, read_ahead: int):
+        self._f = f
+        self._spans = spans
+        self._block_size = block_size
+        self._read_ahead = max(1, read_ahead)
+        self._lock = threading.Lock()
+
+    def _blocks(self):
+        for span in self._spans:
+            if isinstance(span, bytes):
+                yield span
+                continue
+            start, end = span
+            while start <= end:
+                n = min(self._block_size, end - start + 1)
+                yield (start, n)
+                start += n
+
+    def _read_at(self, offset: int, n: int) -> bytes:
+        with self._lock:
+            if self._f.closed:
+                return b""
+            self._f.seek(offset)
+            return self._f.read(n)
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        blocks = self._blocks()
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < self._read_ahead:
+                    block = next(blocks, None)
+                    if block is None:
+                        break
+                    if isinstance(block, bytes):
+                        fut = loop.create_future()
+                        fut.set_result(block)
+                    else:
+                        fut = loop.run_in_executor(None, self._read_at, *block)
+                    pending.append(fut)
+                if not pending:
+                    return
+                chunk = await pending.popleft()
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            for fut in pending:
+                fut.cancel()
+            self.close()
+
+
+async def aserve_file(request, path: str, content_type: str, *, filename: str | None = None, st=None):
+    """
+    ``serve_file`` for async views: under ASGI the body is an AsyncFileStream.
+
+    WSGI requests, and ASGI ones with MEDIA_ASYNC_STREAMING off, get the
+    regular serve_file response so wsgi.file_wrapper keeps working.
+    """
+    if not settings.MEDIA_ASYNC_STREAMING or not isinstance(request, ASGIRequest):
+        return serve_file(request, path, content_type, filename=filename, st=st)
+
+    filename = filename or os.path.basename(path)
+    if settings.MEDIA_OFFLOAD:
+        return offload_response(path, content_type, filename)
+
+    t = _prepare(request, path, content_type, filename, st)
+    if isinstance(t, HttpResponseBase):
+        return t
+    if request.method == "HEAD":
+        return HttpResponse(status=t.status, content_type=t.body_type, headers=t.headers)
+
+    try:
+        f = await asyncio.to_thread(open, path, "rb")
+    except FileNotFoundError:
+        raise Http404("File not found")
+
+    if t.parts:
+        heads, tail = t.parts
+        spans = []
+        for head, span in zip(heads, t.ranges):
+            spans += [head, span, b"\r\n"]
+        spans.append(tail)
+    else:
+        spans = t.ranges
+    block_size = min(block_size_for(t.length), ASYNC_MAX_BLOCK_SIZE)
+    stream = AsyncFileStream(f, spans, block_size, settings.MEDIA_ASYNC_READ_AHEAD)
+    resp = StreamingHttpResponse(stream, status=t.status, content_type=t.body_type)
+    for k, v in t.headers.items():
+        resp[k] = v
+    return resp
@@ -0,0 +1,21 @@
+# surveys/mediatypes.py
+# File-type helpers with no Django imports, so process-pool workers can use them.
+import mimetypes
+import os
+
+ALLOWED_EXTS = ("pdf", "mp4", "webm", "ogg")
+VIDEO_EXTS = (".mp4", ".webm", ".ogg")
+PDF_EXTS = (".pdf",)
+VIDEO_MIME = {".mp4": "video/mp4", ".webm": "video/webm", ".ogg": "video/ogg"}
+
+
+def guess_mime(path: str) -> str:
+    ext = os.path.splitext(path or "")[1].lower()
+    if ext in VIDEO_MIME:
+        return VIDEO_MIME[ext]
+    mime, _ = mimetypes.guess_type(path or "")
+    return mime or "application/octet-stream"
+
+
+def media_kind_for(path: str) -> str:
+    return "video" if os.path.splitext(path or "")[1].lower() in VIDEO_EXTS else "pdf"
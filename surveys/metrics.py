@@ -0,0 +1,236 @@
+# surveys/metrics.py
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = contextvars.ContextVar("surveys_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "template_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    # Installed on every connection; counts against the request in the current
+    # context, which asgiref carries into sync_to_async threads.
+    m = _current.get()
+    if m is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        m.db_time += time.perf_counter() - t0
+        m.queries += 1
+
+
+def _install_db_wrapper(connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+connection_created.connect(_install_db_wrapper, dispatch_uid="surveys_metrics_db_wrapper")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    """Per-process aggregates keyed by resolved URL name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.db_duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.template_duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.bytes = defaultdict(int)
+        self.responses = defaultdict(int)
+
+    def record(self, view, status, elapsed, m: RequestMetrics):
+        with self._lock:
+            self.duration[view].observe(elapsed)
+            self.db_duration[view].observe(m.db_time)
+            self.template_duration[view].observe(m.template_time)
+            self.queries[view].observe(m.queries)
+            self.responses[(view, status)] += 1
+
+    def add_bytes(self, view, n):
+        with self._lock:
+            self.bytes[view] += n
+
+    def render(self) -> str:
+        lines = []
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for view, h in sorted(series.items()):
+                cumulative = 0
+                for le, n in zip(h.buckets + ("+Inf",), h.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{view="{view}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{view="{view}"}} {h.total}')
+                lines.append(f'{name}_count{{view="{view}"}} {h.count}')
+
+        with self._lock:
+            histogram("surveys_request_duration_seconds", "Time spent handling the request.", self.duration)
+            histogram("surveys_db_duration_seconds", "Time spent in database queries per request.", self.db_duration)
+            histogram("surveys_db_queries", "Database queries per request.", self.queries)
+            histogram("surveys_template_duration_seconds", "Time spent rendering templates per request.", self.template_duration)
+            lines.append("# HELP surveys_responses_total Responses by view and status code.")
+            lines.append("# TYPE surveys_responses_total counter")
+            for (view, status), n in sorted(self.responses.items()):
+                lines.append(f'surveys_responses_total{{view="{view}",status="{status}"}} {n}')
+            lines.append("# HELP surveys_response_bytes_total Response body bytes sent.")
+            lines.append("# TYPE surveys_response_bytes_total counter")
+            for view, n in sorted(self.bytes.items()):
+                lines.append(f'surveys_response_bytes_total{{view="{view}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _count_stream(view, iterator):
+    sent = 0
+    try:
+        for chunk in iterator:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        registry.add_bytes(view, sent)
+
+
+async def _acount_stream(view, iterator):
+    sent = 0
+    try:
+        async for chunk in iterator:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        registry.add_bytes(view, sent)
+
+
+class PerformanceMiddleware:
+    """
+    Record DB queries/time, template time and bytes per request.
+
+    Template time covers TemplateResponses, which this middleware renders
+    itself in process_template_response (it runs last, being first in
+    MIDDLEWARE); the views return TemplateResponse for that. Timings go out
+    in a Server-Timing header and are aggregated per URL name into
+    histograms served by ``metrics_view``. Works as sync or async
+    middleware so async views are not pushed through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for conn in connections.all(initialized_only=True):
+            _install_db_wrapper(conn)
+        m = RequestMetrics()
+        token = _current.set(m)
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, m, time.perf_counter() - t0)
+
+    def process_template_response(self, request, response):
+        m = _current.get()
+        if m is not None:
+            t0 = time.perf_counter()
+            response.render()
+            m.template_time += time.perf_counter() - t0
+        return response
+
+    async def __acall__(self, request):
+        m = RequestMetrics()
+        token = _current.set(m)
+        t0 = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, m, time.perf_counter() - t0)
+
+    def _finish(self, request, response, m, elapsed):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        if view == "surveys:metrics":
+            return response
+
+        response["Server-Timing"] = ", ".join([
+            f"db;dur={m.db_time * 1000:.1f};desc=\"{m.queries} queries\"",
+            f"tpl;dur={m.template_time * 1000:.1f}",
+            f"app;dur={elapsed * 1000:.1f}",
+        ])
+        registry.record(view, response.status_code, elapsed, m)
+
+        if not response.streaming:
+            registry.add_bytes(view, len(response.content))
+        elif response.has_header("Content-Length"):
+            # Keeps FileResponse eligible for wsgi.file_wrapper/sendfile.
+            registry.add_bytes(view, int(response["Content-Length"]))
+        elif response.is_async:
+            response.streaming_content = _acount_stream(view, response.streaming_content)
+        else:
+            response.streaming_content = _count_stream(view, response.streaming_content)
+        return response
+
+
+def _authorized(request) -> bool:
+    user = getattr(request, "user", None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    auth = request.headers.get("Authorization", "")
+    return bool(token) and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].encode(), token.encode())
+
+
+def metrics_view(request):
+    # Staff sessions or the DJANGO_METRICS_TOKEN bearer token only: behind a
+    # reverse proxy every client address looks local.
+    if not _authorized(request):
+        return HttpResponseForbidden("metrics need a staff login or the metrics token")
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
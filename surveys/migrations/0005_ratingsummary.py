@@ -0,0 +1,57 @@
+
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    Answer = apps.get_model("surveys", "Answer")
+    RatingSummary = apps.get_model("surveys", "RatingSummary")
+    totals = {"count": Count("id"), "rating_sum": Sum("rating_int"), "rating_sum_sq": Sum(F("rating_int") * F("rating_int"))}
+    totals.update({f"hist_{i}": Count("id", filter=Q(rating_int=i)) for i in range(1, 8)})
+    rows = (
+        Answer.objects.filter(rating_int__gte=1, rating_int__lte=7)
+        .values("session__doc_id", "question_id")
+        .annotate(**totals)
+        .order_by()
+    )
+    RatingSummary.objects.bulk_create(
+        [
+            RatingSummary(doc_id=r.pop("session__doc_id"), question_id=r.pop("question_id"), **r)
+            for r in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0004_evaluationrun_alter_responsesession_doc_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('rating_sum', models.BigIntegerField(default=0)),
+                ('rating_sum_sq', models.BigIntegerField(default=0)),
+                ('hist_1', models.IntegerField(default=0)),
+                ('hist_2', models.IntegerField(default=0)),
+                ('hist_3', models.IntegerField(default=0)),
+                ('hist_4', models.IntegerField(default=0)),
+                ('hist_5', models.IntegerField(default=0)),
+                ('hist_6', models.IntegerField(default=0)),
+                ('hist_7', models.IntegerField(default=0)),
+                ('doc', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_summaries', to='surveys.instructiondoc')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_summaries', to='surveys.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('doc', 'question'), name='unique_summary_per_doc_question')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    InstructionDoc = apps.get_model("surveys", "InstructionDoc")
+    ResponseSession = apps.get_model("surveys", "ResponseSession")
+    counts = (
+        ResponseSession.objects.filter(doc=OuterRef("pk"))
+        .values("doc")
+        .annotate(
+            assigned=Count("id"),
+            completed=Count("id", filter=Q(finished_at__isnull=False)),
+        )
+    )
+    InstructionDoc.objects.update(
+        assigned_count=Coalesce(Subquery(counts.values("assigned")), 0),
+        completed_count=Coalesce(Subquery(counts.values("completed")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0005_ratingsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='assigned_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='instructiondoc',
+            index=models.Index(fields=['is_active', 'completed_count', 'assigned_count'], name='doc_coverage_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0006_instructiondoc_assigned_count_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='instructiondoc',
+            name='doc_coverage_idx',
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'rating_int'], name='answer_question_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['rating_int'], name='answer_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluationrun',
+            index=models.Index(fields=['created_at'], name='run_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='instructiondoc',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['completed_count', 'assigned_count'], name='doc_coverage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='responsesession',
+            index=models.Index(fields=['started_at'], name='session_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='runprogress',
+            index=models.Index(condition=models.Q(('is_finished', False)), fields=['user_token', '-updated_at'], name='progress_open_by_user_idx'),
+        ),
+    ]
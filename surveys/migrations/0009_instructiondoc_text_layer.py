@@ -0,0 +1,47 @@
+
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0008_instructiondoc_ingest_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='alt_html',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='has_text_layer',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='ocr_notes',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='ocr_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('doc', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='surveys.instructiondoc')),
+            ],
+            options={
+                'ordering': ['doc', 'page_number'],
+                'constraints': [models.UniqueConstraint(fields=('doc', 'page_number'), name='unique_page_per_doc')],
+            },
+        ),
+    ]
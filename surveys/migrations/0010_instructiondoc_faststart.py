@@ -0,0 +1,23 @@
+
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0009_instructiondoc_text_layer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='box_layout',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='faststart',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+    ]
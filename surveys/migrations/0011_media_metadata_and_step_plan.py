@@ -0,0 +1,47 @@
+
+
+from django.db import migrations, models
+
+from surveys.mediatypes import guess_mime, media_kind_for
+
+
+def backfill_media_types(apps, schema_editor):
+    InstructionDoc = apps.get_model("surveys", "InstructionDoc")
+    docs = list(InstructionDoc.objects.only("id", "file"))
+    for doc in docs:
+        doc.media_kind = media_kind_for(doc.file.name)
+        doc.mime_type = guess_mime(doc.file.name)
+    InstructionDoc.objects.bulk_update(docs, ["media_kind", "mime_type"], batch_size=500)
+    # Re-inspect MP4s on the next load_pdfs run to pick up their duration.
+    InstructionDoc.objects.filter(file__iendswith=".mp4").update(box_layout="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0010_instructiondoc_faststart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationrun',
+            name='plan',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='media_kind',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('video', 'Video')], default='pdf', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='instructiondoc',
+            name='mime_type',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.RunPython(backfill_media_types, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+
+
+from django.db import migrations
+
+# External-content FTS5 index over the answer text. Triggers keep it in step
+# with every write path, including bulk upserts that send no signals.
+CREATE = [
+    """
+    CREATE VIRTUAL TABLE surveys_answer_fts USING fts5(
+        reason_text, improvement_text,
+        content='surveys_answer', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # Index the answers already there: the update/delete triggers below
+    # assume every existing row is in the index.
+    "INSERT INTO surveys_answer_fts(surveys_answer_fts) VALUES ('rebuild')",
+    """
+    CREATE TRIGGER surveys_answer_fts_ai AFTER INSERT ON surveys_answer BEGIN
+        INSERT INTO surveys_answer_fts(rowid, reason_text, improvement_text)
+        VALUES (new.id, new.reason_text, new.improvement_text);
+    END
+    """,
+    """
+    CREATE TRIGGER surveys_answer_fts_ad AFTER DELETE ON surveys_answer BEGIN
+        INSERT INTO surveys_answer_fts(surveys_answer_fts, rowid, reason_text, improvement_text)
+        VALUES ('delete', old.id, old.reason_text, old.improvement_text);
+    END
+    """,
+    """
+    CREATE TRIGGER surveys_answer_fts_au AFTER UPDATE OF reason_text, improvement_text ON surveys_answer BEGIN
+        INSERT INTO surveys_answer_fts(surveys_answer_fts, rowid, reason_text, improvement_text)
+        VALUES ('delete', old.id, old.reason_text, old.improvement_text);
+        INSERT INTO surveys_answer_fts(rowid, reason_text, improvement_text)
+        VALUES (new.id, new.reason_text, new.improvement_text);
+    END
+    """,
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS surveys_answer_fts_au",
+    "DROP TRIGGER IF EXISTS surveys_answer_fts_ad",
+    "DROP TRIGGER IF EXISTS surveys_answer_fts_ai",
+    "DROP TABLE IF EXISTS surveys_answer_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0011_media_metadata_and_step_plan'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE), _run(DROP)),
+    ]
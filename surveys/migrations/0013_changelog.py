@@ -0,0 +1,62 @@
+
+
+from django.db import migrations, models
+
+# One AFTER INSERT/UPDATE/DELETE trigger per table and operation. They run
+# inside the writing statement, so bulk upserts and cascaded deletes are
+# logged in the same transaction as the rows they describe.
+TABLES = {
+    "surveys_answer": "answer",
+    "surveys_responsesession": "responsesession",
+    "surveys_evaluationrun": "evaluationrun",
+}
+EVENTS = [("INSERT", "i", "new"), ("UPDATE", "u", "new"), ("DELETE", "d", "old")]
+
+CREATE = [
+    f"""
+    CREATE TRIGGER {table}_changelog_{op} AFTER {event} ON {table} BEGIN
+        INSERT INTO surveys_changelog(model, object_id, op, changed_at)
+        VALUES ('{model}', {row}.id, '{op}', strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """
+    for table, model in TABLES.items()
+    for event, op, row in EVENTS
+]
+
+DROP = [
+    f"DROP TRIGGER IF EXISTS {table}_changelog_{op}"
+    for table in TABLES
+    for _, op, _ in EVENTS
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0012_answer_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('i', 'insert'), ('u', 'update'), ('d', 'delete')], max_length=1)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+        # Rows written before this migration are not logged: copy the tables
+        # once, then follow the log from export_changes --latest.
+        migrations.RunPython(_run(CREATE), _run(DROP)),
+    ]
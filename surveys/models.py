@@ -1,17 +1,9 @@
 from email.policy import default
 from django.db import models
 from django.core.validators import FileExtensionValidator
-import mimetypes
 import os
 
-
-ALLOWED_EXTS = ("pdf", "mp4", "webm", "ogg")
-VIDEO_EXTS = (".mp4", ".webm", ".ogg")
-PDF_EXTS = (".pdf",)
-
-def guess_mime(path: str) -> str:
-    mime, _ = mimetypes.guess_type(path or "")
-    return mime or "application/octet-stream"
+from .mediatypes import ALLOWED_EXTS, PDF_EXTS, VIDEO_EXTS, guess_mime, media_kind_for  # noqa: F401
 
 
 
@@ -24,6 +16,39 @@ class InstructionDoc(models.Model):
     )
     version = models.CharField(max_length=20, blank=True)
     is_active = models.BooleanField(default=True)
+    # Coverage counters used by surveys.scheduling to balance assignments.
+    assigned_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    # Ingest manifest (see load_pdfs): unchanged size/mtime means the stored
+    # hash is still valid and the file is not re-read.
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    file_mtime_ns = models.BigIntegerField(null=True, blank=True)
+    # Text alternative filled by the extract_pdf_text command.
+    OCR_STATUS_CHOICES = [("pending", "Pending"), ("done", "Done"), ("failed", "Failed")]
+    has_text_layer = models.BooleanField(default=False)
+    ocr_status = models.CharField(max_length=20, choices=OCR_STATUS_CHOICES, default="pending")
+    ocr_notes = models.TextField(blank=True)
+    alt_html = models.TextField(blank=True)
+    # MP4 layout checked (and fixed) at ingest; None when not an MP4 or unreadable.
+    faststart = models.BooleanField(null=True, blank=True)
+    box_layout = models.CharField(max_length=200, blank=True)
+    # Stored at ingest/upload so serving a step needs no path parsing or stat().
+    KIND_CHOICES = [("pdf", "PDF"), ("video", "Video")]
+    media_kind = models.CharField(max_length=10, choices=KIND_CHOICES, default="pdf")
+    mime_type = models.CharField(max_length=100, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Partial on is_active: SQLite renders the filter as a bare
+            # boolean column, which can't seek a leading index column.
+            models.Index(
+                fields=["completed_count", "assigned_count"],
+                condition=models.Q(is_active=True),
+                name="doc_coverage_idx",
+            )
+        ]
 
     def __str__(self):
         v = f" (v{self.version})" if self.version else ""
@@ -38,24 +63,38 @@ class InstructionDoc(models.Model):
     def ext(self) -> str:
         return os.path.splitext(self.file.name or "")[1].lower()
 
-    @property
-    def mime_type(self) -> str:
-        return guess_mime(self.file.name)
-
     @property
     def is_pdf(self) -> bool:
-        return (self.ext in PDF_EXTS)
+        return self.media_kind == "pdf"
 
     @property
     def is_video(self) -> bool:
-        return (self.ext in VIDEO_EXTS)
+        return self.media_kind == "video"
+
+    def set_media_type(self):
+        self.media_kind = media_kind_for(self.file.name)
+        self.mime_type = guess_mime(self.file.name)
+
+    def save(self, *args, **kwargs):
+        if self.file and not self.mime_type:
+            self.set_media_type()
+        super().save(*args, **kwargs)
 
-    @property
-    def media_kind(self) -> str:
-        
-        if self.is_video:
-            return "video"
-        return "pdf"
+
+class DocumentPage(models.Model):
+    """Extracted text of one page of an InstructionDoc (1-based page numbers)."""
+    doc = models.ForeignKey(InstructionDoc, on_delete=models.CASCADE, related_name="pages")
+    page_number = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["doc", "page_number"]
+        constraints = [
+            models.UniqueConstraint(fields=["doc", "page_number"], name="unique_page_per_doc"),
+        ]
+
+    def __str__(self):
+        return f"{self.doc_id} p{self.page_number}"
 
 
 class Question(models.Model):
@@ -94,6 +133,13 @@ class EvaluationRun(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     total_steps = models.PositiveSmallIntegerField(default=0)
+    # One entry per step, fixed at start: {"doc", "kind", "mime", "title"}.
+    plan = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="run_created_idx"),
+        ]
 
     def __str__(self):
         ut = self.user_token or "anonymous"
@@ -115,6 +161,12 @@ class ResponseSession(models.Model):
     finished_at = models.DateTimeField(null=True, blank=True)
     consented = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Export/admin date filters on session start.
+            models.Index(fields=["started_at"], name="session_started_idx"),
+        ]
+
     def __str__(self):
         return f"Session {self.id} on {self.doc}"
 
@@ -136,6 +188,11 @@ class Answer(models.Model):
                 name="unique_answer_per_session_question",
             )
         ]
+        indexes = [
+            # Admin "question" and "rating" filters.
+            models.Index(fields=["question", "rating_int"], name="answer_question_rating_idx"),
+            models.Index(fields=["rating_int"], name="answer_rating_idx"),
+        ]
 
     def __str__(self):
         return f"Answer s{self.session_id}/q{self.question_id}={self.rating_int}"
@@ -155,3 +212,97 @@ class RunProgress(models.Model):
     is_finished = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # home/start/evaluate/done: open progress for a user, newest first.
+            models.Index(
+                fields=["user_token", "-updated_at"],
+                condition=models.Q(is_finished=False),
+                name="progress_open_by_user_idx",
+            ),
+        ]
+
+
+class RatingSummary(models.Model):
+    """
+    Running totals of Answer.rating_int for one (doc, question) pair.
+
+    Maintained incrementally by surveys.stats on every answer write, so
+    means/variances never need a scan of Answer. Ratings outside 1..7 are
+    not counted.
+    """
+    doc = models.ForeignKey(InstructionDoc, on_delete=models.CASCADE, related_name="rating_summaries")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="rating_summaries")
+    count = models.IntegerField(default=0)
+    rating_sum = models.BigIntegerField(default=0)
+    rating_sum_sq = models.BigIntegerField(default=0)
+    hist_1 = models.IntegerField(default=0)
+    hist_2 = models.IntegerField(default=0)
+    hist_3 = models.IntegerField(default=0)
+    hist_4 = models.IntegerField(default=0)
+    hist_5 = models.IntegerField(default=0)
+    hist_6 = models.IntegerField(default=0)
+    hist_7 = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doc", "question"],
+                name="unique_summary_per_doc_question",
+            )
+        ]
+
+    def __str__(self):
+        return f"Summary d{self.doc_id}/q{self.question_id} (n={self.count})"
+
+    @property
+    def histogram(self) -> list[int]:
+        return [getattr(self, f"hist_{i}") for i in range(1, 8)]
+
+    @property
+    def min_rating(self):
+        return next((i for i, n in enumerate(self.histogram, start=1) if n), None)
+
+    @property
+    def max_rating(self):
+        return next((i for i, n in reversed(list(enumerate(self.histogram, start=1))) if n), None)
+
+    @property
+    def mean(self):
+        return self.rating_sum / self.count if self.count else None
+
+    @property
+    def variance(self):
+        # Sample variance; None until there are two ratings.
+        if self.count < 2:
+            return None
+        return max(0.0, (self.rating_sum_sq - self.rating_sum ** 2 / self.count) / (self.count - 1))
+
+    @property
+    def ci95(self):
+        # Normal approximation of the 95% confidence interval of the mean.
+        if self.variance is None:
+            return None
+        half = 1.96 * (self.variance / self.count) ** 0.5
+        return (self.mean - half, self.mean + half)
+
+
+class ChangeLog(models.Model):
+    """
+    Append-only log of Answer, ResponseSession and EvaluationRun writes.
+
+    Rows are inserted by SQLite triggers (migration 0013) in the writing
+    transaction, so every write path is covered. ``id`` is the sequence
+    number that consumers of surveys.changes resume from.
+    """
+    INSERT, UPDATE, DELETE = "i", "u", "d"
+    OPS = [(INSERT, "insert"), (UPDATE, "update"), (DELETE, "delete")]
+
+    model = models.CharField(max_length=32)  # model_name: answer, responsesession, evaluationrun
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=1, choices=OPS)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_op_display()} {self.model} {self.object_id}"
@@ -0,0 +1,228 @@
+# surveys/mp4.py
+import os
+import shutil
+import struct
+import tempfile
+from collections import namedtuple
+
+COPY_CHUNK = 1024 * 1024
+# Boxes on the path from moov down to the chunk offset tables.
+CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+Box = namedtuple("Box", ["type", "offset", "size", "header"])
+# boxes: top-level Box list; faststart: moov precedes the first mdat.
+Layout = namedtuple("Layout", ["boxes", "faststart"])
+
+
+class MP4Error(Exception):
+    pass
+
+
+def _read_box(f, offset: int, end: int):
+    f.seek(offset)
+    head = f.read(8)
+    if len(head) < 8:
+        return None
+    size, typ = struct.unpack(">I4s", head)
+    header = 8
+    if size == 1:
+        ext = f.read(8)
+        if len(ext) < 8:
+            raise MP4Error(f"truncated {typ!r} header at {offset}")
+        size = struct.unpack(">Q", ext)[0]
+        header = 16
+    elif size == 0:
+        size = end - offset
+    if size < header or offset + size > end:
+        raise MP4Error(f"invalid {typ!r} box size {size} at {offset}")
+    return Box(typ, offset, size, header)
+
+
+def top_level_boxes(f, file_size: int) -> list[Box]:
+    boxes = []
+    offset = 0
+    while offset < file_size:
+        box = _read_box(f, offset, file_size)
+        if box is None:
+            break
+        boxes.append(box)
+        offset += box.size
+    return boxes
+
+
+def inspect(path: str) -> Layout:
+    """Top-level box layout of an MP4; only box headers are read."""
+    with open(path, "rb") as f:
+        boxes = top_level_boxes(f, os.fstat(f.fileno()).st_size)
+    types = [b.type for b in boxes]
+    if b"moov" not in types:
+        raise MP4Error("no moov box")
+    moov = types.index(b"moov")
+    mdat = types.index(b"mdat") if b"mdat" in types else len(types)
+    return Layout(boxes, moov < mdat)
+
+
+def duration(path: str, layout: Layout | None = None):
+    """Movie duration in seconds from ``moov/mvhd``, or None if it is missing or unset."""
+    layout = layout or inspect(path)
+    moov = next(b for b in layout.boxes if b.type == b"moov")
+    with open(path, "rb") as f:
+        f.seek(moov.offset)
+        raw = f.read(moov.size)
+    for typ, body in _parse(raw, moov.header, moov.size):
+        if typ != b"mvhd" or len(body) < 20:
+            continue
+        if body[0] == 1:
+            if len(body) < 32:
+                return None
+            timescale, length = struct.unpack_from(">IQ", body, 20)
+        else:
+            timescale, length = struct.unpack_from(">II", body, 12)
+        if not timescale or length in (0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+            return None
+        return length / timescale
+    return None
+
+
+def layout_string(layout: Layout) -> str:
+    return ",".join(b.type.decode("latin-1") for b in layout.boxes)
+
+
+def _parse(data: bytes, start: int, end: int):
+    """Parse ``data[start:end]`` into ``(type, children | payload)`` nodes, descending CONTAINERS."""
+    nodes = []
+    pos = start
+    while pos + 8 <= end:
+        size, typ = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise MP4Error(f"invalid {typ!r} box inside moov")
+        body_start, body_end = pos + header, pos + size
+        if typ in CONTAINERS:
+            nodes.append((typ, _parse(data, body_start, body_end)))
+        else:
+            nodes.append((typ, data[body_start:body_end]))
+        pos = body_end
+    return nodes
+
+
+def _serialize(nodes) -> bytes:
+    out = []
+    for typ, body in nodes:
+        payload = _serialize(body) if isinstance(body, list) else body
+        size = len(payload) + 8
+        if size > 0xFFFFFFFF:
+            out.append(struct.pack(">I4sQ", 1, typ, size + 8))
+        else:
+            out.append(struct.pack(">I4s", size, typ))
+        out.append(payload)
+    return b"".join(out)
+
+
+def _shift_offsets(nodes, shift):
+    """Copy of ``nodes`` with stco/co64 entries mapped through ``shift``; stco becomes co64 on overflow."""
+    out = []
+    for typ, body in nodes:
+        if isinstance(body, list):
+            out.append((typ, _shift_offsets(body, shift)))
+        elif typ in (b"stco", b"co64"):
+            width = "I" if typ == b"stco" else "Q"
+            (count,) = struct.unpack_from(">I", body, 4)
+            offsets = [shift(o) for o in struct.unpack_from(f">{count}{width}", body, 8)]
+            if typ == b"stco" and offsets and max(offsets) > 0xFFFFFFFF:
+                typ, width = b"co64", "Q"
+            out.append((typ, body[:8] + struct.pack(f">{count}{width}", *offsets)))
+        else:
+            out.append((typ, body))
+    return out
+
+
+def _copy_range(src, dst, start: int, end: int):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK, remaining))
+        if not chunk:
+            raise MP4Error("file shrank while copying")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def make_faststart(path: str, dest: str | None = None) -> tuple[Layout, bool]:
+    """
+    Move ``moov`` in front of the first ``mdat`` if it is not already there.
+
+    Only moov is held in memory; media data is copied in chunks to a temporary
+    file next to the target that then replaces it. The target is ``path``
+    itself, or ``dest`` to leave ``path`` untouched. Chunk offsets in
+    stco/co64 are shifted by the distance their data moved. Returns the
+    resulting layout and whether a file was written.
+    """
+    layout = inspect(path)
+    if layout.faststart:
+        return layout, False
+
+    types = [b.type for b in layout.boxes]
+    old = layout.boxes[types.index(b"moov")]
+    insert_at = layout.boxes[types.index(b"mdat")].offset
+
+    with open(path, "rb") as src:
+        file_size = os.fstat(src.fileno()).st_size
+        src.seek(old.offset)
+        raw = src.read(old.size)
+        tree = [(b"moov", _parse(raw, old.header, old.size))]
+
+        new_size = old.size
+        while True:
+            # Data between insert_at and the old moov moves down by the new
+            # moov size; data after the old moov by the size difference.
+            def shift(o, new_size=new_size):
+                if o < insert_at:
+                    return o
+                if o < old.offset:
+                    return o + new_size
+                return o + new_size - old.size
+
+            moov = _serialize(_shift_offsets(tree, shift))
+            if len(moov) == new_size:
+                break
+            new_size = len(moov)
+
+        target = dest or path
+        directory = os.path.dirname(os.path.abspath(target))
+        fd, tmp = tempfile.mkstemp(prefix=".faststart-", suffix=".mp4", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                _copy_range(src, dst, 0, insert_at)
+                dst.write(moov)
+                _copy_range(src, dst, insert_at, old.offset)
+                _copy_range(src, dst, old.offset + old.size, file_size)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    try:
+        shutil.copymode(path, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return inspect(target), True
+
+
+def faststart_result(path: str, dest: str | None = None):
+    """
+    make_faststart for ingest: ``(faststart, box_layout, duration, rewritten)``.
+
+    faststart and duration are None if the file can't be parsed.
+    """
+    try:
+        layout, rewritten = make_faststart(path, dest)
+        seconds = duration(dest if rewritten and dest else path, layout)
+    except (MP4Error, struct.error) as exc:
+        return None, f"invalid: {exc}"[:200], None, False
+    return layout.faststart, layout_string(layout)[:200], seconds, rewritten
@@ -0,0 +1,84 @@
+# surveys/pdftext.py
+import re
+
+from django.utils.html import escape
+from pypdf import PdfReader
+
+# Fewer non-whitespace characters than this across the document means the
+# PDF is a scan (or images only) and has no usable text layer.
+MIN_TEXT_CHARS = 20
+
+_LIST_ITEM_RE = re.compile(r"^\s*(?:(?P<num>\d{1,3}[.)])|(?P<bullet>[•▪●\-*]))\s+(?P<text>.*)$")
+_SENTENCE_END = (".", "!", "?", ":")
+
+
+def extract_pages(path: str) -> list[str]:
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        reader.decrypt("")
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def extract_document(path: str):
+    """Process-pool worker: returns ``(pages, None)`` or ``(None, error)``."""
+    try:
+        return extract_pages(path), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def has_text_layer(pages) -> bool:
+    return sum(len(re.sub(r"\s+", "", p)) for p in pages) >= MIN_TEXT_CHARS
+
+
+def _blocks(text: str):
+    """
+    Group extracted lines into ``("p", text)`` and ``("ol"|"ul", text)`` blocks.
+
+    PDF text comes back one visual line at a time; lines are joined until a
+    blank line, sentence-ending punctuation or a list marker.
+    """
+    blocks = []
+    current = None
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if not line:
+            current = None
+            continue
+        m = _LIST_ITEM_RE.match(line)
+        if m:
+            current = ["ol" if m["num"] else "ul", m["text"]]
+            blocks.append(current)
+        elif current is None or current[1].endswith(_SENTENCE_END):
+            current = ["p", line]
+            blocks.append(current)
+        else:
+            current[1] += " " + line
+    return blocks
+
+
+def render_alt_html(pages) -> str:
+    """Accessible HTML for the extracted pages: one headed section per page, lists kept as lists."""
+    out = []
+    for n, text in enumerate(pages, 1):
+        out.append(f'<section class="doc-page" aria-labelledby="doc-page-{n}">')
+        out.append(f'<h2 id="doc-page-{n}">Page {n}</h2>')
+        blocks = _blocks(text)
+        if not blocks:
+            out.append("<p>No text on this page.</p>")
+        open_list = None
+        for kind, body in blocks:
+            if kind != open_list and open_list:
+                out.append(f"</{open_list}>")
+                open_list = None
+            if kind == "p":
+                out.append(f"<p>{escape(body)}</p>")
+                continue
+            if open_list is None:
+                out.append(f"<{kind}>")
+                open_list = kind
+            out.append(f"<li>{escape(body)}</li>")
+        if open_list:
+            out.append(f"</{open_list}>")
+        out.append("</section>")
+    return "\n".join(out)
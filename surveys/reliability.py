@@ -0,0 +1,237 @@
+# surveys/reliability.py
+from collections import namedtuple
+from itertools import chain
+
+from django.db import connection
+
+from .models import Answer, InstructionDoc, Question, ResponseSession
+from .stats import RATINGS
+
+try:
+    import numpy as np
+except ImportError:  # optional: only the reliability report needs it
+    np = None
+
+N_CATS = len(RATINGS)
+# Expected variance of a uniform null on a 1..7 scale, for r_wg.
+UNIFORM_VARIANCE = (N_CATS ** 2 - 1) / 12
+DEFAULT_BOOTSTRAP = 1000
+
+# ratings[r, d, q] is run r's 1..7 rating of doc d on question q, 0 if unrated.
+RatingCube = namedtuple("RatingCube", ["ratings", "run_ids", "doc_ids", "question_ids"])
+
+
+class NumpyMissing(RuntimeError):
+    pass
+
+
+def _require_numpy():
+    if np is None:
+        raise NumpyMissing("The reliability report needs NumPy: pip install numpy")
+
+
+def load_cube() -> RatingCube:
+    """
+    Every in-range rating as a dense int8 (run × doc × question) cube, read in one query.
+
+    Each evaluation run is one rater. The cube takes one byte per cell:
+    20,000 runs over 200 docs and 7 questions is 28 MB.
+    """
+    _require_numpy()
+    qn = connection.ops.quote_name
+    answer, session = qn(Answer._meta.db_table), qn(ResponseSession._meta.db_table)
+    sql = (
+        f"SELECT s.{qn('run_id')}, s.{qn('doc_id')}, a.{qn('question_id')}, a.{qn('rating_int')} "
+        f"FROM {answer} a JOIN {session} s ON s.{qn('id')} = a.{qn('session_id')} "
+        f"WHERE s.{qn('run_id')} IS NOT NULL AND a.{qn('rating_int')} BETWEEN %s AND %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [RATINGS[0], RATINGS[-1]])
+        rows = cursor.fetchall()
+    flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=4 * len(rows)).reshape(-1, 4)
+    run_ids, r = np.unique(flat[:, 0], return_inverse=True)
+    doc_ids, d = np.unique(flat[:, 1], return_inverse=True)
+    question_ids, q = np.unique(flat[:, 2], return_inverse=True)
+    ratings = np.zeros((len(run_ids), len(doc_ids), len(question_ids)), dtype=np.int8)
+    ratings[r, d, q] = flat[:, 3]
+    return RatingCube(ratings, run_ids, doc_ids, question_ids)
+
+
+def category_counts(ratings):
+    """``counts[d, q, c]``: raters who gave doc d rating c + 1 on question q."""
+    counts = np.empty(ratings.shape[1:] + (N_CATS,), dtype=np.int32)
+    for c in range(N_CATS):
+        np.sum(ratings == c + 1, axis=0, out=counts[..., c])
+    return counts
+
+
+def coincidences(counts):
+    """
+    Per-unit ordinal coincidence matrices (Krippendorff), shape ``counts.shape[:-1] + (7, 7)``.
+
+    A unit with m pairable values adds ``(n n^T - diag(n)) / (m - 1)``;
+    units with fewer than two values add nothing.
+    """
+    counts = counts.astype(np.float64)
+    m = counts.sum(-1)
+    w = np.where(m > 1, 1.0 / np.maximum(m - 1, 1), 0.0)[..., None, None]
+    pairs = counts[..., :, None] * counts[..., None, :]
+    idx = np.arange(N_CATS)
+    pairs[..., idx, idx] -= counts
+    return pairs * w
+
+
+def alpha_ordinal(o):
+    """Krippendorff's ordinal alpha from coincidence matrices ``o`` (..., 7, 7); NaN without disagreement."""
+    n_c = o.sum(-1)
+    n = n_c.sum(-1)
+    cum = np.cumsum(n_c, -1)
+    lo = np.minimum.outer(np.arange(N_CATS), np.arange(N_CATS))
+    hi = np.maximum.outer(np.arange(N_CATS), np.arange(N_CATS))
+    # Sum of n_g for g between c and k, minus half of n_c + n_k.
+    span = cum[..., hi] - (cum - n_c)[..., lo]
+    delta = (span - (n_c[..., :, None] + n_c[..., None, :]) / 2) ** 2
+    observed = (o * delta).sum((-1, -2))
+    expected = (n_c[..., :, None] * n_c[..., None, :] * delta).sum((-1, -2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(expected > 0, 1 - (n - 1) * observed / expected, np.nan)
+
+
+def unit_moments(counts):
+    """Per-unit ``(n, sum, sum of squares)`` of the ratings, last axis of size 3."""
+    values = np.arange(1, N_CATS + 1, dtype=np.float64)
+    counts = counts.astype(np.float64)
+    return np.stack([counts.sum(-1), counts @ values, counts @ values ** 2], -1)
+
+
+def icc_oneway(sums):
+    """
+    One-way random-effects ICC(1) and ICC(1,k) from the totals of _icc_sums.
+
+    Runs rate different docs, so the one-way model applies, with k0 for
+    the unequal number of ratings per doc.
+    """
+    n, sum_sq_over_n, sum_sq, total, units, n_sq = (sums[..., i] for i in range(6))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ssb = sum_sq_over_n - total ** 2 / n
+        ssw = sum_sq - sum_sq_over_n
+        msb = ssb / (units - 1)
+        msw = ssw / (n - units)
+        k0 = (n - n_sq / n) / (units - 1)
+        icc1 = (msb - msw) / (msb + (k0 - 1) * msw)
+        icck = (msb - msw) / msb
+    return icc1, icck
+
+
+def _icc_sums(unit_stats, weights=None):
+    """
+    Totals of Σn, Σ(sum²/n), Σ sumsq, Σ sum, units and Σn² over units.
+
+    ``weights`` (B, U) gives one row of totals per bootstrap resample.
+    """
+    n, s, ss = unit_stats[..., 0], unit_stats[..., 1], unit_stats[..., 2]
+    keep = n > 0
+    terms = np.stack([n, np.where(keep, s ** 2 / np.maximum(n, 1), 0), ss, s, keep, n ** 2], -1)
+    return terms.sum(0) if weights is None else weights @ terms
+
+
+def _bootstrap_weights(units: int, rounds: int, rng):
+    """(rounds, units) resampling multiplicities: each row draws ``units`` units with replacement."""
+    return rng.multinomial(units, np.full(units, 1 / units), size=rounds).astype(np.float64)
+
+
+def _ci(samples):
+    samples = samples[np.isfinite(samples)]
+    if not len(samples):
+        return None
+    lo, hi = np.percentile(samples, [2.5, 97.5])
+    return float(lo), float(hi)
+
+
+def _num(x):
+    x = float(x)
+    return x if np.isfinite(x) else None
+
+
+def _reliability(counts, weights):
+    """Alpha, ICC(1), ICC(1,k) and bootstrap CIs over the units of ``counts`` (U, 7)."""
+    o_units = coincidences(counts)
+    unit_stats = unit_moments(counts)
+    icc1, icck = icc_oneway(_icc_sums(unit_stats))
+    row = {
+        "units": int((counts.sum(-1) > 1).sum()),
+        "ratings": int(counts.sum()),
+        "alpha": _num(alpha_ordinal(o_units.sum(0))),
+        "icc1": _num(icc1),
+        "icc1k": _num(icck),
+        "alpha_ci": None,
+        "icc1_ci": None,
+    }
+    if weights is not None:
+        o_boot = (weights @ o_units.reshape(len(counts), -1)).reshape(-1, N_CATS, N_CATS)
+        row["alpha_ci"] = _ci(alpha_ordinal(o_boot))
+        row["icc1_ci"] = _ci(icc_oneway(_icc_sums(unit_stats, weights))[0])
+    return row
+
+
+def reliability_report(cube: RatingCube | None = None, bootstrap: int = DEFAULT_BOOTSTRAP, seed: int = 0) -> dict:
+    """
+    Inter-rater reliability of the ratings, treating docs as units and runs as raters.
+
+    ``dimensions``: per question, ordinal Krippendorff's alpha, ICC(1) and
+    ICC(1,k), with percentile 95% CIs from ``bootstrap`` resamples of docs.
+    ``overall``: alpha over every (doc, question) unit.
+    ``docs``: per doc, alpha with the questions as units, and per question the
+    mean rating, rater count and r_wg agreement (1 - variance / uniform variance).
+    """
+    _require_numpy()
+    cube = cube if cube is not None else load_cube()
+    counts = category_counts(cube.ratings)
+    n_docs, n_questions = counts.shape[:2]
+    rng = np.random.default_rng(seed)
+    weights = _bootstrap_weights(n_docs, bootstrap, rng) if bootstrap and n_docs else None
+
+    questions = Question.objects.in_bulk([int(q) for q in cube.question_ids])
+    dimensions = []
+    for j, qid in enumerate(cube.question_ids):
+        q = questions.get(int(qid))
+        row = _reliability(counts[:, j], weights)
+        dimensions.append({"question": int(qid), "key": q.key if q else str(qid), **row})
+
+    flat = counts.reshape(-1, N_CATS)
+    flat_weights = None
+    if weights is not None:
+        # Resample whole docs: each doc's questions move together.
+        flat_weights = np.repeat(weights, n_questions, axis=1)
+    overall = _reliability(flat, flat_weights)
+
+    moments = unit_moments(counts)
+    m, s, ss = moments[..., 0], moments[..., 1], moments[..., 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s / m
+        var = (ss - s ** 2 / m) / (m - 1)
+        rwg = np.clip(1 - var / UNIFORM_VARIANCE, 0, 1)
+    doc_alpha = alpha_ordinal(coincidences(counts).sum(1))
+    raters = (cube.ratings > 0).any(-1).sum(0)
+    titles = dict(InstructionDoc.objects.filter(pk__in=[int(d) for d in cube.doc_ids]).values_list("id", "title"))
+    docs = []
+    for i, did in enumerate(cube.doc_ids):
+        docs.append({
+            "doc": int(did),
+            "title": titles.get(int(did), ""),
+            "raters": int(raters[i]),
+            "alpha": _num(doc_alpha[i]),
+            "dimensions": {
+                d["key"]: {"n": int(m[i, j]), "mean": _num(mean[i, j]), "rwg": _num(rwg[i, j])}
+                for j, d in enumerate(dimensions)
+            },
+        })
+
+    return {
+        "raters": len(cube.run_ids),
+        "docs_rated": n_docs,
+        "bootstrap": bootstrap if weights is not None else 0,
+        "overall": overall,
+        "dimensions": dimensions,
+        "docs": docs,
+    }
@@ -0,0 +1,52 @@
+# surveys/resume.py
+from collections import namedtuple
+
+RESUME_COOKIE = "resume"
+# Older tokens are treated as stale and RunProgress is read instead.
+RESUME_MAX_AGE = 3600 * 24 * 30
+_SALT = "surveys.resume"
+
+# Client-side copy of the open RunProgress row: enough to rebuild the
+# evaluation session keys without a query.
+ResumeState = namedtuple("ResumeState", ["run_id", "resp_ids", "doc_ids", "step"])
+
+
+def _ids(values) -> str:
+    return "_".join(str(int(v)) for v in values)
+
+
+def encode(state: ResumeState) -> str:
+    """``run.sessions.docs.step``, e.g. ``12.40_41_42.7_3_9.2``."""
+    return f"{int(state.run_id or 0)}.{_ids(state.resp_ids)}.{_ids(state.doc_ids)}.{int(state.step)}"
+
+
+def decode(value: str):
+    try:
+        run, resp, docs, step = value.split(".")
+        resp_ids = [int(v) for v in resp.split("_")]
+        doc_ids = [int(v) for v in docs.split("_")]
+        state = ResumeState(int(run) or None, resp_ids, doc_ids, int(step))
+    except ValueError:
+        return None
+    if len(resp_ids) != len(doc_ids) or not 1 <= state.step <= len(resp_ids):
+        return None
+    return state
+
+
+def read(request, uid: str):
+    """The state from a valid, unexpired token issued to ``uid``, else None."""
+    if not uid:
+        return None
+    value = request.get_signed_cookie(RESUME_COOKIE, default=None, salt=f"{_SALT}:{uid}", max_age=RESUME_MAX_AGE)
+    return decode(value) if value else None
+
+
+def write(response, uid: str, state: ResumeState):
+    if uid:
+        response.set_signed_cookie(
+            RESUME_COOKIE, encode(state), salt=f"{_SALT}:{uid}", max_age=RESUME_MAX_AGE, httponly=True, samesite="Lax"
+        )
+
+
+def clear(response):
+    response.delete_cookie(RESUME_COOKIE, samesite="Lax")
@@ -0,0 +1,78 @@
+# surveys/scheduling.py
+import random
+from itertools import zip_longest
+
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import InstructionDoc
+
+VIDEO_Q = Q(media_kind="video")
+PLAN_FIELDS = ["id", "title", "file", "media_kind", "mime_type"]
+
+
+def _least_covered(qs, k: int) -> list[int]:
+    """
+    Ids of up to ``k`` docs with the lowest (completed, assigned) counts.
+
+    Reads walk doc_coverage_idx; only the docs tied at the cut-off are
+    shuffled, so the whole catalog is never loaded.
+    """
+    if k <= 0:
+        return []
+    ordered = qs.order_by("completed_count", "assigned_count")
+    cutoff = list(ordered.values_list("completed_count", "assigned_count")[k - 1:k])
+    if not cutoff:
+        return list(ordered.values_list("id", flat=True))
+
+    completed, assigned = cutoff[0]
+    below = list(
+        qs.filter(Q(completed_count__lt=completed) | Q(completed_count=completed, assigned_count__lt=assigned))
+        .values_list("id", flat=True)
+    )
+    ties = qs.filter(completed_count=completed, assigned_count=assigned).order_by("?")
+    if connection.features.has_select_for_update_skip_locked:
+        # Concurrent starts skip tied docs another transaction just took.
+        ties = ties.select_for_update(skip_locked=True)
+    return below + list(ties.values_list("id", flat=True)[:k - len(below)])
+
+
+def assign_docs(k: int, *, interleave: bool = False) -> list[InstructionDoc]:
+    """
+    Pick the ``k`` least-covered active docs for a new run and count the assignment.
+
+    With ``interleave`` the run alternates PDF, video, PDF, ... (falling back
+    to whichever kind is left). Call inside ``transaction.atomic()``: counters
+    move with F() updates, so concurrent starts never lose an increment and
+    later calls see the new coverage.
+    """
+    active = InstructionDoc.objects.filter(is_active=True)
+    if interleave:
+        videos = _least_covered(active.filter(VIDEO_Q), k // 2)
+        pdfs = _least_covered(active.exclude(VIDEO_Q), k - len(videos))
+        if len(pdfs) + len(videos) < k:
+            videos += _least_covered(active.filter(VIDEO_Q).exclude(id__in=videos), k - len(pdfs) - len(videos))
+        random.shuffle(pdfs)
+        random.shuffle(videos)
+        ids = [i for pair in zip_longest(pdfs, videos) for i in pair if i is not None]
+    else:
+        ids = _least_covered(active, k)
+        random.shuffle(ids)
+
+    if not ids:
+        return []
+    InstructionDoc.objects.filter(id__in=ids).update(assigned_count=F("assigned_count") + 1)
+    docs = InstructionDoc.objects.only(*PLAN_FIELDS).in_bulk(ids)
+    return [docs[i] for i in ids]
+
+
+def step_plan(docs) -> list[dict]:
+    """The EvaluationRun.plan entries for ``docs``, one per step in order."""
+    return [
+        {"doc": d.id, "kind": d.media_kind, "mime": d.mime_type, "title": d.title}
+        for d in docs
+    ]
+
+
+def record_completions(doc_ids) -> None:
+    InstructionDoc.objects.filter(id__in=list(doc_ids)).update(completed_count=F("completed_count") + 1)
@@ -0,0 +1,96 @@
+# surveys/search.py
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+# External-content FTS5 index over Answer.reason_text/improvement_text, kept
+# in sync by triggers (migration 0012) and rebuilt by rebuild_answer_search.
+FTS_TABLE = "surveys_answer_fts"
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+
+def available() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn a search box string into an FTS5 query.
+
+    ``"quoted words"`` stay phrases, ``word*`` is a prefix search and every
+    other word must appear. FTS5 operators and punctuation in the input are
+    never interpreted, so any string is a valid query; "" means no terms.
+    """
+    terms = []
+    for phrase, word in _TOKEN_RE.findall(text or ""):
+        words = _WORD_RE.findall(phrase or word)
+        if not words:
+            continue
+        term = '"' + " ".join(words) + '"'
+        if word and word.endswith("*") and len(words) == 1:
+            term += "*"
+        terms.append(term)
+    return " ".join(terms)
+
+
+def matching_ids(query: str) -> RawSQL:
+    """Answer ids matching ``query`` (an fts_query string), for ``id__in=``."""
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query])
+
+
+def _highlight(snippet: str) -> str:
+    return escape(snippet).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def search_answers(text: str, *, question_id=None, doc_id=None, limit=50, offset=0):
+    """
+    Answers whose reason or improvement text matches ``text``, best first (bm25).
+
+    Returns dicts with the answer, session, doc and question ids, the rating,
+    the rank and an HTML-escaped snippet of each text field with the matched
+    terms wrapped in ``<mark>``.
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    where = [f"{FTS_TABLE} MATCH %s"]
+    params = [query]
+    if question_id is not None:
+        where.append("a.question_id = %s")
+        params.append(question_id)
+    if doc_id is not None:
+        where.append("s.doc_id = %s")
+        params.append(doc_id)
+    sql = f"""
+        SELECT a.id, a.session_id, s.doc_id, a.question_id, a.rating_int, {FTS_TABLE}.rank,
+               snippet({FTS_TABLE}, 0, %s, %s, '…', 16),
+               snippet({FTS_TABLE}, 1, %s, %s, '…', 16)
+        FROM {FTS_TABLE}
+        JOIN surveys_answer a ON a.id = {FTS_TABLE}.rowid
+        JOIN surveys_responsesession s ON s.id = a.session_id
+        WHERE {" AND ".join(where)}
+        ORDER BY {FTS_TABLE}.rank
+        LIMIT %s OFFSET %s
+    """
+    marks = [_MARK_OPEN, _MARK_CLOSE] * 2
+    with connection.cursor() as cursor:
+        cursor.execute(sql, marks + params + [limit, offset])
+        rows = cursor.fetchall()
+    return [
+        {
+            "answer": answer_id,
+            "session": session_id,
+            "doc": doc,
+            "question": question,
+            "rating": rating,
+            "rank": rank,
+            "reason": _highlight(reason),
+            "improvement": _highlight(improvement),
+        }
+        for answer_id, session_id, doc, question, rating, rank, reason, improvement in rows
+    ]
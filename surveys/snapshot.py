@@ -0,0 +1,140 @@
+# surveys/snapshot.py
+"""
+On-disk rating snapshot written by ``manage.py snapshot_ratings``.
+
+A snapshot directory holds:
+
+- ``ratings.npy``: int8 (session row × question column); 0 means unanswered.
+- ``sessions.npy``: one SESSION_DTYPE record per row (session, run and doc
+  ids, index into users.txt, finished_at as epoch seconds).
+- ``users.txt``: one user token per line.
+- ``manifest.json``: question columns, committed row/user counts and the
+  finished_at watermark.
+
+Rows are only appended. The manifest is replaced last, so it is the commit
+point: bytes past its counts (from an interrupted append) are ignored by
+readers and cut off by the next append. This module needs only NumPy, so
+analysts can load a copied snapshot without Django:
+
+    snap = load("snapshots/ratings")
+    snap.ratings[snap.sessions["doc"] == 12]
+"""
+import io
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib import format as npy
+
+FORMAT_VERSION = 1
+RATINGS_FILE = "ratings.npy"
+SESSIONS_FILE = "sessions.npy"
+USERS_FILE = "users.txt"
+MANIFEST_FILE = "manifest.json"
+
+SESSION_DTYPE = np.dtype([
+    ("session", "<i8"),
+    ("run", "<i8"),
+    ("doc", "<i8"),
+    ("user", "<i4"),
+    ("finished", "<i8"),
+])
+
+Snapshot = namedtuple("Snapshot", ["ratings", "sessions", "questions", "manifest", "path"])
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def read_manifest(path: str):
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return None
+    if manifest.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {manifest.get('format')!r}")
+    return manifest
+
+
+def write_manifest(path: str, manifest: dict):
+    tmp = os.path.join(path, MANIFEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, os.path.join(path, MANIFEST_FILE))
+
+
+def load(path: str, mmap_mode: str = "r") -> Snapshot:
+    """Memory-map a snapshot: nothing is read per rating until it is used."""
+    manifest = read_manifest(path)
+    if manifest is None:
+        raise SnapshotError(f"No snapshot at {path}")
+    rows = manifest["rows"]
+    ratings = np.load(os.path.join(path, RATINGS_FILE), mmap_mode=mmap_mode)[:rows]
+    sessions = np.load(os.path.join(path, SESSIONS_FILE), mmap_mode=mmap_mode)[:rows]
+    return Snapshot(ratings, sessions, manifest["questions"], manifest, path)
+
+
+def load_users(snapshot: Snapshot) -> list[str]:
+    """User tokens indexed by ``sessions["user"]``."""
+    with open(os.path.join(snapshot.path, USERS_FILE), "rb") as fh:
+        data = fh.read(snapshot.manifest["users_bytes"])
+    return data.decode("utf-8").split("\n")[:-1]
+
+
+def _header(fh):
+    """``(version, shape, dtype, data offset)`` of an open .npy file."""
+    version = npy.read_magic(fh)
+    if version == (1, 0):
+        shape, fortran_order, dtype = npy.read_array_header_1_0(fh)
+    else:
+        shape, fortran_order, dtype = npy.read_array_header_2_0(fh)
+    if fortran_order:
+        raise SnapshotError("Snapshot arrays must be C-ordered")
+    return version, shape, dtype, fh.tell()
+
+
+def append_rows(filename: str, rows, committed: int):
+    """
+    Append ``rows`` along axis 0 of the .npy file at ``filename``, in place.
+
+    The new rows replace anything past the first ``committed`` rows. The
+    header shape is rewritten in place: NumPy pads headers so the first
+    dimension can grow without the header changing size.
+    """
+    rows = np.ascontiguousarray(rows)
+    if not os.path.exists(filename):
+        if committed:
+            raise SnapshotError(f"{filename} is missing")
+        np.save(filename, rows)
+        return
+    with open(filename, "r+b") as fh:
+        version, shape, dtype, offset = _header(fh)
+        if dtype != rows.dtype or tuple(shape[1:]) != rows.shape[1:]:
+            raise SnapshotError(f"{filename} holds {dtype} {shape}, cannot append {rows.dtype} {rows.shape}")
+        if shape[0] < committed:
+            raise SnapshotError(f"{filename} has {shape[0]} rows, manifest expects {committed}")
+        header = io.BytesIO()
+        d = {"descr": npy.dtype_to_descr(dtype), "fortran_order": False, "shape": (committed + len(rows), *shape[1:])}
+        if version == (1, 0):
+            npy.write_array_header_1_0(header, d)
+        else:
+            npy.write_array_header_2_0(header, d)
+        if header.tell() != offset:
+            raise SnapshotError(f"{filename}: header no longer fits; rebuild the snapshot")
+
+        # Rows first, then the header, then the cut: the file is never
+        # shorter than its header says.
+        row_bytes = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+        fh.seek(offset + committed * row_bytes)
+        fh.write(rows.tobytes())
+        end = fh.tell()
+        fh.seek(0)
+        fh.write(header.getvalue())
+        fh.truncate(end)
+        fh.flush()
+        os.fsync(fh.fileno())
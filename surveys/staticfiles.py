@@ -0,0 +1,218 @@
+# surveys/staticfiles.py
+import gzip
+import json
+import mimetypes
+import os
+import re
+import threading
+from collections import namedtuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .media import ASYNC_MAX_BLOCK_SIZE, AsyncFileStream, block_size_for
+
+try:
+    import brotli
+except ImportError:  # gzip variants are still written and served
+    brotli = None
+
+COMPRESSIBLE_EXTS = {".css", ".js", ".mjs", ".svg", ".json", ".map", ".txt", ".html", ".xml", ".ico"}
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Unhashed names may change on the next deploy.
+REVALIDATE = "public, max-age=60, must-revalidate"
+
+# Content-Encoding -> precompressed file suffix, in preference order.
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+_CODING_RE = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$")
+
+
+def compress_file(path: str) -> list[str]:
+    """Write ``path.gz`` (and ``path.br`` when brotli is installed) if they are smaller; returns the written paths."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    variants = [(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((path + ".br", brotli.compress(data, quality=11)))
+    written = []
+    for out, body in variants:
+        if len(body) < len(data):
+            with open(out, "wb") as fh:
+                fh.write(body)
+            written.append(out)
+        elif os.path.exists(out):
+            os.remove(out)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed names plus precompressed ``.gz``/``.br`` siblings, built at collectstatic.
+
+    Only the hashed copies are compressed; they are what templates reference
+    once DEBUG is off.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in dict.fromkeys(hashed):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTS:
+                continue
+            path = self.path(name)
+            if os.path.getsize(path) >= MIN_COMPRESS_SIZE:
+                for out in compress_file(path):
+                    yield os.path.relpath(out, self.location), os.path.relpath(out, self.location), True
+
+
+StaticEntry = namedtuple("StaticEntry", ["path", "content_type", "immutable", "variants"])
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings the client accepts; ``*`` covers ENCODINGS not refused with ``q=0``."""
+    accepted, refused = set(), set()
+    wildcard = False
+    for part in (header or "").split(","):
+        m = _CODING_RE.match(part)
+        if not m:
+            continue
+        coding = m[1].lower()
+        try:
+            ok = m[2] is None or float(m[2]) > 0
+        except ValueError:
+            continue
+        if coding == "*":
+            wildcard = ok
+        elif ok:
+            accepted.add(coding)
+        else:
+            refused.add(coding)
+    if wildcard:
+        accepted |= set(ENCODINGS) - refused
+    return accepted
+
+
+class StaticIndex:
+    """STATIC_ROOT listing built once per process; collected files don't change while it runs."""
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        hashed = set()
+        try:
+            with open(os.path.join(self.root, "staticfiles.json"), encoding="utf-8") as fh:
+                hashed = set(json.load(fh).get("paths", {}).values())
+        except (OSError, ValueError):
+            pass
+
+        entries = {}
+        suffixes = tuple(ENCODINGS.values())
+        for dirpath, _, filenames in os.walk(self.root):
+            names = set(filenames)
+            for filename in filenames:
+                if filename.endswith(suffixes) and filename.rsplit(".", 1)[0] in names:
+                    continue
+                path = os.path.join(dirpath, filename)
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                content_type, _ = mimetypes.guess_type(filename)
+                variants = {
+                    coding: path + suffix for coding, suffix in ENCODINGS.items() if filename + suffix in names
+                }
+                entries[rel] = StaticEntry(path, content_type or "application/octet-stream", rel in hashed, variants)
+        return entries
+
+    def get(self, rel: str):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._build()
+        return self._entries.get(rel)
+
+
+def static_response(request, entry: StaticEntry, asynchronous: bool = False):
+    coding = None
+    if entry.variants:
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        coding = next((c for c in ENCODINGS if c in accepted and c in entry.variants), None)
+    path = entry.variants[coding] if coding else entry.path
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    headers = {
+        "ETag": f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+        "Last-Modified": http_date(int(st.st_mtime)),
+        "Cache-Control": IMMUTABLE if entry.immutable else REVALIDATE,
+    }
+    if entry.variants:
+        headers["Vary"] = "Accept-Encoding"
+    resp = get_conditional_response(request, etag=headers["ETag"], last_modified=int(st.st_mtime))
+    if resp is None:
+        if request.method == "HEAD":
+            resp = HttpResponse(content_type=entry.content_type)
+            resp["Content-Length"] = str(st.st_size)
+        elif asynchronous:
+            block_size = min(block_size_for(st.st_size), ASYNC_MAX_BLOCK_SIZE)
+            spans = [(0, st.st_size - 1)]
+            stream = AsyncFileStream(open(path, "rb"), spans, block_size, settings.MEDIA_ASYNC_READ_AHEAD)
+            resp = StreamingHttpResponse(stream, content_type=entry.content_type)
+            resp["Content-Length"] = str(st.st_size)
+        else:
+            resp = FileResponse(open(path, "rb"), content_type=entry.content_type)
+            del resp["Content-Disposition"]
+        if coding:
+            resp["Content-Encoding"] = coding
+    for k, v in headers.items():
+        resp[k] = v
+    return resp
+
+
+class StaticFilesMiddleware:
+    """
+    Serve collected files from STATIC_ROOT ahead of the rest of the stack.
+
+    The precompressed variant matching Accept-Encoding is sent as-is, so no
+    request does compression work; hashed names get immutable caching.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else "/" + settings.STATIC_URL
+        self.index = StaticIndex(settings.STATIC_ROOT)
+
+    def _entry(self, request):
+        if request.method in ("GET", "HEAD") and request.path_info.startswith(self.prefix):
+            return self.index.get(request.path_info[len(self.prefix):])
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        entry = self._entry(request)
+        resp = static_response(request, entry) if entry else None
+        return resp if resp is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        entry = self._entry(request)
+        resp = static_response(request, entry, asynchronous=True) if entry else None
+        return resp if resp is not None else await self.get_response(request)
@@ -0,0 +1,129 @@
+# surveys/stats.py
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Answer, InstructionDoc, RatingSummary, ResponseSession
+
+RATINGS = range(1, 8)
+HIST_FIELDS = [f"hist_{i}" for i in RATINGS]
+TOTAL_FIELDS = ["count", "rating_sum", "rating_sum_sq"] + HIST_FIELDS
+
+
+def _delta(rating, sign):
+    row = [0] * len(TOTAL_FIELDS)
+    if rating in RATINGS:
+        row[0] = sign
+        row[1] = sign * rating
+        row[2] = sign * rating * rating
+        row[2 + rating] = sign
+    return row
+
+
+def record_rating_changes(doc_id, changes):
+    """
+    Fold rating changes for one doc into RatingSummary with a single upsert.
+
+    ``changes`` is an iterable of ``(question_id, old_rating, new_rating)``;
+    ``old_rating`` is None for a new answer and ``new_rating`` None for a
+    deleted one.
+    """
+    deltas = defaultdict(lambda: [0] * len(TOTAL_FIELDS))
+    for question_id, old, new in changes:
+        if old == new:
+            continue
+        acc = deltas[question_id]
+        for i, (a, b) in enumerate(zip(_delta(old, -1), _delta(new, 1))):
+            acc[i] += a + b
+    deltas = {qid: d for qid, d in deltas.items() if any(d)}
+    if not deltas:
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(RatingSummary._meta.db_table)
+    cols = ["doc_id", "question_id"] + TOTAL_FIELDS
+    row_sql = "(" + ", ".join(["%s"] * len(cols)) + ")"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in cols)}) "
+        f"VALUES {', '.join([row_sql] * len(deltas))} "
+        f"ON CONFLICT ({qn('doc_id')}, {qn('question_id')}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}" for c in TOTAL_FIELDS)
+    )
+    params = []
+    for qid, d in deltas.items():
+        params.extend([doc_id, qid, *d])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_rating_summaries():
+    """Recompute every RatingSummary row from Answer. Returns the row count."""
+    totals = {"count": Count("id"), "rating_sum": Sum("rating_int"), "rating_sum_sq": Sum(F("rating_int") * F("rating_int"))}
+    totals.update({f"hist_{i}": Count("id", filter=Q(rating_int=i)) for i in RATINGS})
+    rows = (
+        Answer.objects.filter(rating_int__gte=1, rating_int__lte=7)
+        .values("session__doc_id", "question_id")
+        .annotate(**totals)
+        .order_by()
+    )
+    objs = [
+        RatingSummary(
+            doc_id=r["session__doc_id"],
+            question_id=r["question_id"],
+            **{f: r[f] for f in TOTAL_FIELDS},
+        )
+        for r in rows
+    ]
+    with transaction.atomic():
+        RatingSummary.objects.all().delete()
+        RatingSummary.objects.bulk_create(objs, batch_size=500)
+    return len(objs)
+
+
+def summary_payload(summary: RatingSummary) -> dict:
+    ci = summary.ci95
+    return {
+        "question": summary.question.key,
+        "count": summary.count,
+        "mean": summary.mean,
+        "variance": summary.variance,
+        "ci95": list(ci) if ci else None,
+        "min": summary.min_rating,
+        "max": summary.max_rating,
+        "histogram": summary.histogram,
+    }
+
+
+def _doc_id_for(answer):
+    if Answer.session.is_cached(answer):
+        return answer.session.doc_id
+    return ResponseSession.objects.filter(pk=answer.session_id).values_list("doc_id", flat=True).first()
+
+
+# Instance-level writes (update_or_create, admin edits, cascaded deletes) are
+# tracked here; bulk upserts call record_rating_changes() themselves.
+
+@receiver(post_init, sender=Answer)
+def _remember_rating(sender, instance, **kwargs):
+    instance._stored_rating = instance.rating_int if instance.pk else None
+
+
+@receiver(post_save, sender=Answer)
+def _answer_saved(sender, instance, created, **kwargs):
+    old = None if created else instance._stored_rating
+    if old != instance.rating_int:
+        record_rating_changes(_doc_id_for(instance), [(instance.question_id, old, instance.rating_int)])
+    instance._stored_rating = instance.rating_int
+
+
+@receiver(post_delete, sender=Answer)
+def _answer_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting a doc cascades its summaries; don't re-insert rows for it.
+    if getattr(origin, "model", type(origin)) is InstructionDoc:
+        return
+    if instance._stored_rating is not None:
+        record_rating_changes(_doc_id_for(instance), [(instance.question_id, instance._stored_rating, None)])
+
@@ -0,0 +1,71 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+
+from surveys.admin_paging import CURSOR_VAR
+from surveys.models import Answer, EvaluationRun, InstructionDoc, Question, ResponseSession
+
+from .utils import plain_static
+
+ROWS = 150  # past list_per_page, so page 2 exists
+
+
+@plain_static
+class AdminChangelistQueryTests(TestCase):
+    """The large-table changelists cost a fixed number of queries per page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        doc = InstructionDoc.objects.create(title="doc2 manual", file="instructions/doc2.pdf")
+        question = Question.objects.create(key="sensory_conversion", text="Sensory conversion")
+        runs = EvaluationRun.objects.bulk_create([EvaluationRun(user_token=f"token{i:04d}") for i in range(ROWS)])
+        sessions = ResponseSession.objects.bulk_create(
+            [ResponseSession(run=run, doc=doc, user_token=run.user_token) for run in runs]
+        )
+        Answer.objects.bulk_create(
+            [Answer(session=s, question=question, rating_int=4, reason_text="a clear reason") for s in sessions]
+        )
+
+    def changelist(self, model, params):
+        request = RequestFactory().get(f"/admin/surveys/{model._meta.model_name}/", params)
+        # An unsaved active superuser passes every permission check without queries.
+        request.user = get_user_model()(is_active=True, is_staff=True, is_superuser=True)
+        response = admin.site._registry[model].changelist_view(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.context_data["cl"]
+
+    def assertPageQueries(self, model, expected):
+        top = model.objects.order_by("-pk").values_list("pk", flat=True).first()
+        pages = {
+            "first page": {},
+            "page 2": {"p": 2},
+            "keyset page": {CURSOR_VAR: top // 2 + 1},
+            "sorted by id": {"o": "1"},
+            "search": {"q": "token"},
+        }
+        for label, params in pages.items():
+            with self.subTest(label):
+                with self.assertNumQueries(expected):
+                    cl = self.changelist(model, params)
+                self.assertTrue(cl.result_list)
+
+    def test_answer_changelist(self):
+        # Capped count, page, question, doc and run filter choices.
+        self.assertPageQueries(Answer, 5)
+
+    def test_session_changelist(self):
+        # Capped count, page, doc and run filter choices.
+        self.assertPageQueries(ResponseSession, 4)
+
+    def test_run_changelist(self):
+        # Capped count, page and two date_hierarchy queries.
+        self.assertPageQueries(EvaluationRun, 4)
+
+    def test_search_requires_every_word(self):
+        cl = self.changelist(Answer, {"q": "doc2 reason"})
+        self.assertEqual(cl.result_count, ROWS)
+        cl = self.changelist(Answer, {"q": "doc2 missing"})
+        self.assertEqual(cl.result_count, 0)
+        cl = self.changelist(Answer, {"q": "token001"})
+        self.assertEqual(cl.result_count, 10)
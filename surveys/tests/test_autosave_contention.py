@@ -0,0 +1,108 @@
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection
+from django.test import TransactionTestCase, override_settings
+
+from surveys.autosave import AutosaveCoalescer, PartialAnswer, save_partial_answers
+from surveys.models import Answer, EvaluationRun, InstructionDoc, Question, ResponseSession
+
+THREADS = 8
+WRITES = 25
+
+
+class AutosaveContentionTests(TransactionTestCase):
+    """Concurrent autosaves under the SQLite production profile never see 'database is locked'."""
+
+    def setUp(self):
+        # Connect with the production profile whatever DEBUG says.
+        options = connection.settings_dict["OPTIONS"]
+        saved = dict(options)
+        options.clear()
+        options.update(settings.SQLITE_PRODUCTION_OPTIONS)
+        connection.close()
+
+        def restore():
+            options.clear()
+            options.update(saved)
+            connection.close()
+        self.addCleanup(restore)
+
+        self.questions = [
+            Question.objects.create(key=key, text=key, order=i).id
+            for i, (key, _) in enumerate(Question.DIM_CHOICES[:3])
+        ]
+        self.doc = InstructionDoc.objects.create(title="contention", file="instructions/contention.pdf")
+        run = EvaluationRun.objects.create(user_token="contention")
+        self.sessions = ResponseSession.objects.bulk_create(
+            [ResponseSession(run=run, doc=self.doc) for _ in range(THREADS)]
+        )
+
+    def hammer(self):
+        """Autosave from one thread per session; returns the OperationalErrors raised."""
+        errors = []
+        results = []
+        start = threading.Barrier(THREADS)
+
+        def worker(sess):
+            try:
+                start.wait()
+                for n in range(WRITES):
+                    item = PartialAnswer(sess.id, self.doc.id, self.questions[n % len(self.questions)], {
+                        "rating_int": n % 7 + 1,
+                        "reason_text": f"reason {n}",
+                    })
+                    try:
+                        results.extend(save_partial_answers([item]))
+                    except OperationalError as exc:
+                        errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in self.sessions]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [None] * len(results))
+        return errors
+
+    def assertAllSaved(self):
+        self.assertEqual(Answer.objects.count(), THREADS * len(self.questions))
+        last = {n % len(self.questions): n for n in range(WRITES)}
+        for qid_index, n in last.items():
+            ratings = set(Answer.objects.filter(question_id=self.questions[qid_index]).values_list("rating_int", flat=True))
+            self.assertEqual(ratings, {n % 7 + 1})
+
+    @override_settings(AUTOSAVE_COALESCE=False)
+    def test_production_profile(self):
+        self.assertEqual(self.hammer(), [])
+        self.assertAllSaved()
+
+    @override_settings(AUTOSAVE_COALESCE=True)
+    def test_coalesced(self):
+        self.assertEqual(self.hammer(), [])
+        self.assertAllSaved()
+
+    def test_coalesced_failure_stays_with_its_request(self):
+        coalescer = AutosaveCoalescer(max_delay=0.5)
+        good = PartialAnswer(self.sessions[0].id, self.doc.id, self.questions[0], {"rating_int": 4})
+        missing_session = PartialAnswer(10**9, self.doc.id, self.questions[0], {"rating_int": 4})
+        outcomes = {}
+        start = threading.Barrier(2)
+
+        def worker(name, item):
+            start.wait()
+            try:
+                outcomes[name] = coalescer.submit([item])
+            except Exception as exc:
+                outcomes[name] = exc
+
+        threads = [threading.Thread(target=worker, args=a) for a in (("good", good), ("bad", missing_session))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(outcomes["good"], [None])
+        self.assertIsInstance(outcomes["bad"], IntegrityError)
+        self.assertEqual(Answer.objects.get().session_id, self.sessions[0].id)
@@ -0,0 +1,15 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from surveys.management.commands.check_query_plans import full_scans, hot_queries, query_plan
+
+
+@skipUnless(connection.vendor == "sqlite", "reads SQLite EXPLAIN QUERY PLAN output")
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, qs in hot_queries().items():
+            with self.subTest(name):
+                plan = query_plan(qs)
+                self.assertEqual(full_scans(plan), [], f"{name}: {plan}")
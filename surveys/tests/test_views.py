@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from surveys import resume
+from surveys.media import file_etag
+from surveys.models import InstructionDoc, Question, RatingSummary, ResponseSession, RunProgress
+from surveys.views import COOKIE_UID, QUEUE_KEY, RESP_KEY, STEP_KEY, _commit_step
+
+from .utils import plain_static
+
+
+@plain_static
+class EvaluateViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Question.objects.create(key="sensory_conversion", text="Sensory conversion")
+        cls.doc = InstructionDoc.objects.create(title="Legacy manual", file="instructions/legacy.pdf")
+
+    def start_session(self, sess):
+        session = self.client.session
+        session.update({QUEUE_KEY: [self.doc.id], RESP_KEY: [sess.id], STEP_KEY: 1})
+        session.save()
+
+    def test_session_without_run_uses_doc_plan(self):
+        # Sessions from before EvaluationRun existed have no run and no plan.
+        self.start_session(ResponseSession.objects.create(doc=self.doc))
+        response = self.client.get(reverse("surveys:evaluate", args=[1]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["is_pdf_step"])
+        self.assertContains(response, "Legacy manual")
+
+    def test_resubmitted_step_moves_summary_counts(self):
+        sess = ResponseSession.objects.create(doc=self.doc)
+        questions = list(Question.objects.all())
+        q = questions[0]
+        for rating in (2, 6):
+            _commit_step(sess, questions, {f"rating_{q.id}": rating}, uid="", resp_ids=[sess.id], next_step=2)
+        summary = RatingSummary.objects.get(doc=self.doc, question=q)
+        self.assertEqual((summary.count, summary.rating_sum, summary.hist_2, summary.hist_6), (1, 6, 0, 1))
+
+
+@plain_static
+class ResumeCookieTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doc = InstructionDoc.objects.create(title="Manual", file="instructions/manual.pdf")
+
+    def set_resume_cookie(self, state):
+        self.client.cookies[COOKIE_UID] = "u1"
+        response = HttpResponse()
+        resume.write(response, "u1", state)
+        self.client.cookies[resume.RESUME_COOKIE] = response.cookies[resume.RESUME_COOKIE].value
+
+    def test_cookie_for_deleted_sessions_falls_back_to_progress(self):
+        sess = ResponseSession.objects.create(doc=self.doc)
+        RunProgress.objects.create(user_token="u1", resp_session_ids=[sess.id], current_step=1, total_steps=1)
+        self.set_resume_cookie(resume.ResumeState(None, [sess.id + 100], [self.doc.id], 1))
+
+        response = self.client.get(reverse("surveys:start"))
+        self.assertRedirects(response, reverse("surveys:evaluate", args=[1]), fetch_redirect_response=False)
+        self.assertEqual(self.client.session[RESP_KEY], [sess.id])
+        fresh = resume.encode(resume.ResumeState(None, [sess.id], [self.doc.id], 1))
+        self.assertTrue(response.cookies[resume.RESUME_COOKIE].value.startswith(fresh + ":"))
+
+    def test_cookie_for_deleted_sessions_is_cleared(self):
+        self.set_resume_cookie(resume.ResumeState(None, [12345], [self.doc.id], 1))
+
+        response = self.client.get(reverse("surveys:evaluate", args=[1]))
+        self.assertRedirects(response, reverse("surveys:home"), fetch_redirect_response=False)
+        self.assertEqual(response.cookies[resume.RESUME_COOKIE].value, "")
+        self.assertNotIn(RESP_KEY, self.client.session)
+
+
+class DocMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        os.makedirs(os.path.join(self.media_root, "instructions"))
+        self.path = os.path.join(self.media_root, "instructions", "manual.pdf")
+
+    def test_replaced_file_is_served_with_its_own_stat(self):
+        with open(self.path, "wb") as fh:
+            fh.write(b"%PDF-1.4 old")
+        st = os.stat(self.path)
+        doc = InstructionDoc.objects.create(
+            title="Manual", file="instructions/manual.pdf", file_size=st.st_size, file_mtime_ns=st.st_mtime_ns
+        )
+        with open(self.path, "wb") as fh:
+            fh.write(b"%PDF-1.4 replaced with a longer file")
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        response = self.client.get(reverse("surveys:inline_pdf", args=[doc.id]), HTTP_RANGE="bytes=0-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 0-35/36")
+        self.assertEqual(response["ETag"], file_etag(os.stat(self.path)))
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 replaced with a longer file")
+
+    def test_not_modified_keeps_validators_and_filename_is_encoded(self):
+        path = os.path.join(self.media_root, "instructions", 'Öfen "Pro".pdf')
+        with open(path, "wb") as fh:
+            fh.write(b"%PDF-1.4")
+        doc = InstructionDoc.objects.create(title="Ovens", file='instructions/Öfen "Pro".pdf')
+        url = reverse("surveys:inline_pdf", args=[doc.id])
+
+        response = self.client.head(url)
+        self.assertEqual(response["Content-Disposition"], "inline; filename*=utf-8''%C3%96fen%20%22Pro%22.pdf")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], file_etag(os.stat(path)))
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
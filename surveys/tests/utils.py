@@ -0,0 +1,8 @@
+from django.conf import settings
+from django.test import override_settings
+
+# The manifest storage needs collectstatic output, which tests don't have.
+plain_static = override_settings(STORAGES={
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
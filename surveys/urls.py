@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from .metrics import metrics_view
 
 app_name = "surveys"
 
@@ -10,7 +11,14 @@ urlpatterns = [
     path("done", views.done, name="done"),                        
     path("thanks/", views.thanks, name="thanks"),
     path("doc/<int:pk>/inline/", views.inline_pdf, name="inline_pdf"), 
+    path("doc/<int:pk>/text/", views.doc_text, name="doc_text"),
+    path("doc/<int:pk>/media/", views.doc_media, name="doc_media"),
     path("stream/video/<str:filename>", views.stream_video, name="stream_video"),
     path("api/save/<int:session_id>/<int:question_id>/", views.save_partial_answer, name="save_partial_answer"),               
+    path("api/save/<int:session_id>/", views.save_partial_answers, name="save_partial_answers"),
+    path("api/docs/<int:doc_id>/summary/", views.doc_summary, name="doc_summary"),
+    path("api/answers/search/", views.search_answers, name="search_answers"),
+    path("api/changes/", views.change_feed, name="change_feed"),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
@@ -1,33 +1,39 @@
 # surveys/views.py
+import asyncio
 import os
-import random
-import re
 import json
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 
 from django.conf import settings
+from django.db import connection, transaction
 from django.urls import reverse
 from django.http import (
-    StreamingHttpResponse,
-    FileResponse,
     Http404,
     HttpResponse,
     HttpResponseBadRequest,
 )
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect
+from django.template.response import TemplateResponse
 from django.utils import timezone
 
-from .forms import EvaluationForm
-from .models import Answer, InstructionDoc, Question, ResponseSession, RunProgress, EvaluationRun
+from . import autosave, changes, resume, search
+from .autosave import PartialAnswer, partial_updates
+from .catalog import get_catalog
+from .media import aserve_file, video_table
+from .scheduling import assign_docs, record_completions, step_plan
+from .stats import record_rating_changes, summary_payload
+from .models import Answer, InstructionDoc, Question, RatingSummary, ResponseSession, RunProgress, EvaluationRun
 
 COOKIE_UID = "uid"
 QUEUE_KEY = "doc_queue_ids"
 RESP_KEY = "resp_session_ids"
 STEP_KEY = "current_step"
+RUN_LENGTH = 5
 
 
 def _get_or_set_uid(request, response=None):
@@ -42,105 +48,194 @@ def _get_or_set_uid(request, response=None):
 
 
 def _restore_from_progress_if_any(request):
+    """
+    Rebuild the evaluation session keys for the uid's open run.
+
+    A valid signed resume cookie is used once its sessions are confirmed to
+    still exist; RunProgress is only read when it is missing, stale or points
+    at deleted sessions. Returns ``(state, from_db)``, state being None when
+    there is nothing to resume; ``from_db`` means the resume cookie has to be
+    rewritten, or cleared when state is None.
+    """
     uid = request.COOKIES.get(COOKIE_UID)
     if not uid:
-        return False
-
-    prog = RunProgress.objects.filter(
-        user_token=uid,
-        is_finished=False
-    ).order_by("-updated_at").select_related("run").first()
+        return None, False
+
+    state = resume.read(request, uid)
+    if state and ResponseSession.objects.filter(id__in=state.resp_ids).count() != len(set(state.resp_ids)):
+        state = None
+    from_db = state is None
+    if from_db:
+        prog = RunProgress.objects.filter(
+            user_token=uid,
+            is_finished=False
+        ).order_by("-updated_at").first()
+        if not prog:
+            return None, True
+
+        doc_by_sess = dict(
+            ResponseSession.objects.filter(id__in=prog.resp_session_ids).values_list("id", "doc_id")
+        )
+        resp_ids = [i for i in prog.resp_session_ids if i in doc_by_sess]
+        if not resp_ids:
+            return None, True
+        state = resume.ResumeState(
+            prog.run_id,
+            resp_ids,
+            [doc_by_sess[i] for i in resp_ids],
+            max(1, min(prog.current_step, len(resp_ids))),
+        )
 
-    if not prog:
-        return False
+    request.session[QUEUE_KEY] = state.doc_ids
+    request.session[RESP_KEY] = state.resp_ids
+    request.session[STEP_KEY] = state.step
+    request.session.modified = True
+    return state, from_db
 
-    resp_ids = prog.resp_session_ids
-    docs = list(
-        ResponseSession.objects.filter(id__in=resp_ids)
-        .select_related("doc", "run")
-        .order_by("id")
-    )
-    if not docs:
-        return False
 
-    request.session[QUEUE_KEY] = [s.doc_id for s in docs]
-    request.session[RESP_KEY] = resp_ids
-    request.session[STEP_KEY] = max(1, min(prog.current_step, prog.total_steps))
-    request.session.modified = True
-    return True
+def _home_clearing_resume(request, stale):
+    resp = redirect("surveys:home")
+    if stale and resume.RESUME_COOKIE in request.COOKIES:
+        resume.clear(resp)
+    return resp
 
 
 def home(request):
     uid = request.COOKIES.get(COOKIE_UID)
     resume_step = None
-    if uid:
+    state = resume.read(request, uid)
+    if state:
+        resume_step = state.step
+    elif uid:
         prog = RunProgress.objects.filter(user_token=uid, is_finished=False).order_by("-updated_at").first()
         if prog:
             resume_step = prog.current_step
-    return render(request, "surveys/home.html", {"resume_step": resume_step})
+    return TemplateResponse(request, "surveys/home.html", {"resume_step": resume_step})
 
 
 def start(request):
   
     if request.method != "POST":
        
-        if _restore_from_progress_if_any(request):
-            return redirect("surveys:evaluate", step=request.session.get(STEP_KEY, 1))
-        return redirect("surveys:home")
+        state, from_db = _restore_from_progress_if_any(request)
+        if state:
+            resp = redirect("surveys:evaluate", step=state.step)
+            if from_db:
+                resume.write(resp, request.COOKIES[COOKIE_UID], state)
+            return resp
+        return _home_clearing_resume(request, from_db)
 
-    docs = list(InstructionDoc.objects.filter(is_active=True))
-    if not docs:
-        messages.error(request, "No instruction PDFs configured.")
-        return redirect("surveys:home")
+    resp = redirect("surveys:evaluate", step=1)
+    uid = _get_or_set_uid(request, resp)
 
-    
-    k = min(5, len(docs))
-    chosen = random.sample(docs, k=k)
+    with transaction.atomic():
+        # The run INSERT comes first so SQLite takes its write lock before the
+        # scheduler reads coverage counters.
+        run = EvaluationRun.objects.create(user_token=uid or "", total_steps=RUN_LENGTH)
+        chosen = assign_docs(RUN_LENGTH, interleave=settings.SCHEDULER_INTERLEAVE_MEDIA)
+        if not chosen:
+            transaction.set_rollback(True)
+            messages.error(request, "No instruction PDFs configured.")
+            return redirect("surveys:home")
+        run.total_steps = len(chosen)
+        run.plan = step_plan(chosen)
+        run.save(update_fields=["total_steps", "plan"])
+
+        sessions = ResponseSession.objects.bulk_create(
+            [ResponseSession(run=run, doc=d) for d in chosen]
+        )
+        resp_ids = [sess.id for sess in sessions]
 
-    
-    resp_ids: list[int] = []
-    for d in chosen:
-        sess = ResponseSession.objects.create(doc=d)
-        resp_ids.append(sess.id)
+        progress = {
+            "run": run,
+            "resp_session_ids": resp_ids,
+            "current_step": 1,
+            "total_steps": len(resp_ids),
+        }
+        updated = RunProgress.objects.filter(user_token=uid, is_finished=False).update(
+            updated_at=timezone.now(), **progress
+        )
+        if not updated:
+            RunProgress.objects.create(user_token=uid, **progress)
 
-    
     request.session[QUEUE_KEY] = [d.id for d in chosen]
     request.session[RESP_KEY] = resp_ids
     request.session[STEP_KEY] = 1
     request.session.modified = True
+    resume.write(resp, uid, resume.ResumeState(run.id, resp_ids, [d.id for d in chosen], 1))
+
+    return resp
 
-    
-    resp = redirect("surveys:evaluate", step=1)
-    uid = _get_or_set_uid(request, resp)
 
-    
-    run = EvaluationRun.objects.create(
-        user_token=uid or "",
-        total_steps=len(resp_ids),
-    )
-    
-    ResponseSession.objects.filter(id__in=resp_ids).update(run=run)
-
-    
-    RunProgress.objects.update_or_create(
-        user_token=uid,
-        is_finished=False,
-        defaults={
-            "resp_session_ids": resp_ids,
-            "current_step": 1,
-            "total_steps": len(resp_ids),
-        },
-    )
 
-    return resp
 
+def _claim_old_ratings(session_id, question_ids):
+    """
+    Current ratings of the answers the step is about to overwrite, read by a
+    no-op UPDATE so the transaction opens with a write.
 
+    A SELECT first would take a read lock that has to be upgraded for the
+    upsert, which fails with "database is locked" under deferred transactions
+    when another writer got in between.
+    """
+    if not question_ids:
+        return {}
+    table = connection.ops.quote_name(Answer._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(question_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET rating_int = rating_int "
+            f"WHERE session_id = %s AND question_id IN ({placeholders}) "
+            "RETURNING question_id, rating_int",
+            [session_id, *question_ids],
+        )
+        return dict(cursor.fetchall())
+
+
+def _commit_step(sess, questions, cleaned_data, *, uid, resp_ids, next_step):
+    """Write every answer for the step and the progress row in one transaction."""
+    rows = [
+        Answer(
+            session=sess,
+            question=q,
+            rating_int=int(cleaned_data[f"rating_{q.id}"]),
+            reason_text=cleaned_data.get(f"reason_{q.id}", "").strip(),
+            improvement_text=cleaned_data.get(f"improve_{q.id}", "").strip(),
+        )
+        for q in questions
+    ]
+    with transaction.atomic():
+        old = _claim_old_ratings(sess.id, [q.id for q in questions])
+        # One INSERT .. ON CONFLICT on unique_answer_per_session_question.
+        Answer.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["session", "question"],
+            update_fields=["rating_int", "reason_text", "improvement_text"],
+        )
+        record_rating_changes(sess.doc_id, [(a.question_id, old.get(a.question_id), a.rating_int) for a in rows])
+        if uid:
+            progress = {
+                "resp_session_ids": resp_ids,
+                "current_step": min(next_step, len(resp_ids)),
+                "total_steps": len(resp_ids),
+            }
+            updated = RunProgress.objects.filter(user_token=uid, is_finished=False).update(
+                updated_at=timezone.now(), **progress
+            )
+            if not updated:
+                RunProgress.objects.create(user_token=uid, run_id=sess.run_id, **progress)
 
 
 def evaluate(request, step: int):
+    uid = request.COOKIES.get(COOKIE_UID, "")
+    restored = None
     if not request.session.get(RESP_KEY):
-        if not _restore_from_progress_if_any(request):
-            return redirect("surveys:home")
+        state, from_db = _restore_from_progress_if_any(request)
+        if not state:
+            return _home_clearing_resume(request, from_db)
+        if from_db:
+            restored = state
 
     queue = request.session.get(QUEUE_KEY)
     resp_ids = request.session.get(RESP_KEY)
@@ -156,47 +251,36 @@ def evaluate(request, step: int):
         raise Http404("Invalid step")
 
     sess_id = resp_ids[step - 1]
-    sess = get_object_or_404(ResponseSession, id=sess_id)
+    sess = get_object_or_404(
+        ResponseSession.objects.select_related("doc", "run").defer("doc__alt_html"), id=sess_id
+    )
 
-    questions = list(Question.objects.filter(is_active=True).order_by("order", "id"))
+    catalog = get_catalog()
+    questions = catalog.questions
     has_errors = False  
 
     if request.method == "POST":
-        form = EvaluationForm(request.POST, questions=questions)
+        form = catalog.form_class(request.POST)
         if form.is_valid():
-            for q in questions:
-                rating = int(form.cleaned_data[f"rating_{q.id}"])
-                reason = form.cleaned_data.get(f"reason_{q.id}", "").strip()
-                improve = form.cleaned_data.get(f"improve_{q.id}", "").strip()
-                Answer.objects.update_or_create(
-                    session=sess,
-                    question=q,
-                    defaults={
-                        "rating_int": rating,
-                        "reason_text": reason,
-                        "improvement_text": improve,
-                    },
-                )
-
             next_step = step + 1
+            _commit_step(
+                sess,
+                questions,
+                form.cleaned_data,
+                uid=uid,
+                resp_ids=resp_ids,
+                next_step=next_step,
+            )
             request.session[STEP_KEY] = next_step
             request.session.modified = True
 
-            uid = request.COOKIES.get(COOKIE_UID, "")
-            if uid:
-                RunProgress.objects.update_or_create(
-                    user_token=uid,
-                    is_finished=False,
-                    defaults={
-                        "resp_session_ids": resp_ids,
-                        "current_step": min(next_step, len(resp_ids)),
-                        "total_steps": len(resp_ids),
-                    },
-                )
-
             if next_step > len(resp_ids):
-                return redirect("surveys:done")
-            return redirect("surveys:evaluate", step=next_step)
+                response = redirect("surveys:done")
+            else:
+                response = redirect("surveys:evaluate", step=next_step)
+            state = resume.ResumeState(sess.run_id, resp_ids, queue, min(next_step, len(resp_ids)))
+            resume.write(response, uid, state)
+            return response
         else:
             
             has_errors = True
@@ -214,7 +298,7 @@ def evaluate(request, step: int):
                 initial[f"rating_{q.id}"] = a.rating_int
                 initial[f"reason_{q.id}"] = a.reason_text or ""
                 initial[f"improve_{q.id}"] = a.improvement_text or ""
-        form = EvaluationForm(questions=questions, data=None, initial=initial)
+        form = catalog.form_class(initial=initial)
 
     q_rows = [
         {
@@ -226,18 +310,10 @@ def evaluate(request, step: int):
         for q in questions
     ]
 
-    is_pdf_step = (step % 2 == 1)
-    is_video_step = not is_pdf_step
-
-    video_url = None
-    video_title = None
-    if is_video_step:
-        if step == 2:
-            video_url = reverse("surveys:stream_video", args=["video1_faststart.mp4"])
-            video_title = "Product Manual – Video 1"
-        elif step == 4:
-            video_url = reverse("surveys:stream_video", args=["video2_faststart.mp4"])
-            video_title = "Product Manual – Video 2"
+    plan = sess.run.plan if sess.run_id else []
+    entry = plan[step - 1] if step <= len(plan) else step_plan([sess.doc])[0]
+    is_video_step = entry["kind"] == "video"
+    is_pdf_step = not is_video_step
 
     context = {
         "step": step,
@@ -248,11 +324,15 @@ def evaluate(request, step: int):
         "is_last": (step == len(resp_ids)),
         "is_pdf_step": is_pdf_step,
         "is_video_step": is_video_step,
-        "video_url": video_url,
-        "video_title": video_title,
+        "video_url": reverse("surveys:doc_media", args=[entry["doc"]]) if is_video_step else None,
+        "video_title": entry["title"],
+        "video_mime": entry["mime"],
         
     }
-    return render(request, "surveys/evaluate.html", context)
+    response = TemplateResponse(request, "surveys/evaluate.html", context)
+    if restored:
+        resume.write(response, uid, restored)
+    return response
 
 def done(request):
     resp_ids = request.session.get(RESP_KEY)
@@ -263,13 +343,13 @@ def done(request):
         ResponseSession.objects.filter(id__in=resp_ids)
         .select_related("doc", "run")
     )
-    questions = list(Question.objects.filter(is_active=True).order_by("order", "id"))
+    questions = get_catalog().questions
 
     if request.method == "POST":
         now = timezone.now()
         uid = request.COOKIES.get(COOKIE_UID, "")
 
-        
+        record_completions(s.doc_id for s in sessions if s.finished_at is None)
         for s in sessions:
             s.user_token = uid
             s.finished_at = now
@@ -294,9 +374,11 @@ def done(request):
         for k in (QUEUE_KEY, RESP_KEY, STEP_KEY):
             request.session.pop(k, None)
         request.session.modified = True
-        return redirect("surveys:thanks")
+        response = redirect("surveys:thanks")
+        resume.clear(response)
+        return response
 
-    return render(
+    return TemplateResponse(
         request,
         "surveys/done.html",
         {"sessions": sessions, "questions": questions},
@@ -304,19 +386,39 @@ def done(request):
 
 
 def thanks(request):
-    return render(request, "surveys/thanks.html")
+    return TemplateResponse(request, "surveys/thanks.html")
+
+
+def doc_text(request, pk: int):
+    # alt_html is built from escaped PDF text by extract_pdf_text.
+    doc = get_object_or_404(InstructionDoc.objects.only("id", "title", "file", "alt_html"), pk=pk)
+    if not doc.alt_html:
+        raise Http404("No text version for this document")
+    return TemplateResponse(request, "surveys/doc_text.html", {"doc": doc})
+
 
+DOC_MEDIA_FIELDS = ("id", "file", "media_kind", "mime_type")
 
-def inline_pdf(request, pk: int):
-    doc = get_object_or_404(InstructionDoc, pk=pk)
-    file_path = doc.file.path
-    if not file_path.lower().endswith(".pdf"):
+
+async def _doc_stat(doc):
+    # Not the size/mtime stored at ingest: the file may have been replaced since,
+    # and a stale stat would send the wrong Content-Length, ranges and ETag.
+    try:
+        return await asyncio.to_thread(os.stat, doc.file.path)
+    except FileNotFoundError:
+        raise Http404("File not found")
+
+
+async def inline_pdf(request, pk: int):
+    doc = await aget_object_or_404(InstructionDoc.objects.only(*DOC_MEDIA_FIELDS), pk=pk)
+    if not doc.is_pdf:
         return HttpResponse("Not a PDF", status=400)
-    with open(file_path, "rb") as f:
-        data = f.read()
-    resp = HttpResponse(data, content_type="application/pdf")
-    resp["Content-Disposition"] = f'inline; filename="{os.path.basename(file_path)}"'
-    return resp
+    return await aserve_file(request, doc.file.path, "application/pdf", st=await _doc_stat(doc))
+
+
+async def doc_media(request, pk: int):
+    doc = await aget_object_or_404(InstructionDoc.objects.only(*DOC_MEDIA_FIELDS), pk=pk)
+    return await aserve_file(request, doc.file.path, doc.mime_type, st=await _doc_stat(doc))
 
 @require_POST
 def save_partial_answer(request, session_id: int, question_id: int):
@@ -328,71 +430,129 @@ def save_partial_answer(request, session_id: int, question_id: int):
     except Exception:
         return JsonResponse({"ok": False, "error": "bad_json"}, status=400)
 
-    updates = {}
-    if "rating" in payload and payload["rating"] not in (None, ""):
-        try:
-            r = int(payload["rating"])
-        except Exception:
-            return JsonResponse({"ok": False, "error": "invalid_rating"}, status=400)
-        if r < 1 or r > 7:
-            return JsonResponse({"ok": False, "error": "rating_out_of_range"}, status=400)
-        updates["rating_int"] = r
-
-    if "reason" in payload:
-        updates["reason_text"] = (payload["reason"] or "").strip()
-
-    if "improve" in payload:
-        updates["improvement_text"] = (payload["improve"] or "").strip()
-
-    if not updates:
-        return JsonResponse({"ok": False, "error": "no_fields"}, status=400)
-
-    Answer.objects.update_or_create(
-        session=sess,
-        question=q,
-        defaults=updates,
-    )
+    updates, error = partial_updates(payload)
+    if error:
+        return JsonResponse({"ok": False, "error": error}, status=400)
+
+    [error] = autosave.save_partial_answers([PartialAnswer(sess.id, sess.doc_id, q.id, updates)])
+    if error:
+        return JsonResponse({"ok": False, "error": error}, status=400)
     return JsonResponse({"ok": True, "saved": list(updates.keys())})
 
-def stream_video(request, filename: str):
-    file_path = os.path.join(settings.MEDIA_ROOT, "videos", filename)
-    if not os.path.exists(file_path):
-        raise Http404("Video not found")
 
-    file_size = os.path.getsize(file_path)
-    content_type = "video/mp4"
-    range_header = request.META.get("HTTP_RANGE", "").strip()
-    range_match = re.match(r"bytes=(\d+)-(\d*)", range_header)
-
-    if range_match:
-        start = int(range_match.group(1))
-        end_str = range_match.group(2)
-        end = int(end_str) if end_str else file_size - 1
-        end = min(end, file_size - 1)
-        length = end - start + 1
-
-        def file_iterator(path, offset, length, chunk_size=8192):
-            with open(path, "rb") as f:
-                f.seek(offset)
-                remaining = length
-                while remaining > 0:
-                    chunk = f.read(min(chunk_size, remaining))
-                    if not chunk:
-                        break
-                    yield chunk
-                    remaining -= len(chunk)
-
-        resp = StreamingHttpResponse(
-            file_iterator(file_path, start, length),
-            status=206,
-            content_type=content_type,
-        )
-        resp["Content-Length"] = str(length)
-        resp["Content-Range"] = f"bytes {start}-{end}/{file_size}"
-        resp["Accept-Ranges"] = "bytes"
-        return resp
-
-    resp = FileResponse(open(file_path, "rb"), content_type=content_type)
-    resp["Content-Length"] = str(file_size)
-    resp["Accept-Ranges"] = "bytes"
-    return resp
+@require_POST
+def save_partial_answers(request, session_id: int):
+    """
+    Autosave many questions of one session from a single JSON body:
+    ``{"answers": {"<question_id>": {"rating": .., "reason": .., "improve": ..}}}``.
+
+    Each entry is validated like save_partial_answer; the valid ones are
+    written in one transaction with one upsert and every entry gets its own
+    result so the client can retry just the failures.
+    """
+    sess = get_object_or_404(ResponseSession, id=session_id)
+
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return JsonResponse({"ok": False, "error": "bad_json"}, status=400)
+    answers = payload.get("answers") if isinstance(payload, dict) else None
+    if not isinstance(answers, dict) or not answers:
+        return JsonResponse({"ok": False, "error": "no_answers"}, status=400)
+
+    active_ids = {q.id for q in get_catalog().questions}
+    results = {}
+    pending = []
+    for key, item in answers.items():
+        try:
+            qid = int(key)
+        except (TypeError, ValueError):
+            qid = None
+        if qid not in active_ids:
+            results[key] = {"ok": False, "error": "unknown_question"}
+            continue
+        updates, error = partial_updates(item)
+        if error:
+            results[key] = {"ok": False, "error": error}
+        else:
+            pending.append((key, PartialAnswer(sess.id, sess.doc_id, qid, updates)))
+
+    errors = autosave.save_partial_answers([item for _, item in pending]) if pending else []
+    for (key, item), error in zip(pending, errors):
+        if error:
+            results[key] = {"ok": False, "error": error}
+        else:
+            results[key] = {"ok": True, "saved": list(item.updates.keys())}
+
+    results = {key: results[key] for key in answers}
+    return JsonResponse({"ok": all(r["ok"] for r in results.values()), "results": results})
+
+async def stream_video(request, filename: str):
+    entry = video_table.get(filename)
+    if entry is None:
+        raise Http404("Video not found")
+    try:
+        return await aserve_file(request, entry.path, entry.content_type, st=entry.stat)
+    except Http404:
+        video_table.invalidate()
+        raise
+
+
+@staff_member_required
+def doc_summary(request, doc_id: int):
+    doc = get_object_or_404(InstructionDoc, pk=doc_id)
+    summaries = RatingSummary.objects.filter(doc=doc).select_related("question").order_by("question__order", "question_id")
+    return JsonResponse({
+        "doc": doc.id,
+        "title": doc.title,
+        "questions": [summary_payload(s) for s in summaries],
+    })
+
+
+@staff_member_required
+def search_answers(request):
+    """
+    Ranked full-text search over answer reasons and improvements:
+    ``?q=`` (words, "phrases", prefix*), optional ``question`` (key or id),
+    ``doc``, ``limit`` (max 200) and ``offset``.
+    """
+    if not search.available():
+        return JsonResponse({"error": "search_unavailable"}, status=501)
+    q = request.GET.get("q", "").strip()
+    if not search.fts_query(q):
+        return JsonResponse({"error": "missing_query"}, status=400)
+
+    question_id = doc_id = None
+    question = request.GET.get("question", "").strip()
+    try:
+        if question:
+            if question.isdigit():
+                question_id = int(question)
+            else:
+                question_id = Question.objects.values_list("id", flat=True).get(key=question)
+        if request.GET.get("doc"):
+            doc_id = int(request.GET["doc"])
+        limit = max(1, min(int(request.GET.get("limit", 50)), 200))
+        offset = max(0, int(request.GET.get("offset", 0)))
+    except (Question.DoesNotExist, ValueError):
+        return JsonResponse({"error": "bad_filter"}, status=400)
+
+    results = search.search_answers(q, question_id=question_id, doc_id=doc_id, limit=limit, offset=offset)
+    return JsonResponse({"q": q, "offset": offset, "results": results})
+
+
+@staff_member_required
+def change_feed(request):
+    """
+    Answer/session/run changes after ``?after=<seq>`` (``limit`` log entries,
+    max 10,000). Clients store ``next`` and poll again while ``more`` is true.
+    """
+    if not changes.available():
+        return JsonResponse({"error": "changes_unavailable"}, status=501)
+    try:
+        after = max(0, int(request.GET.get("after", 0)))
+        limit = max(1, min(int(request.GET.get("limit", changes.DEFAULT_LIMIT)), changes.MAX_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "bad_cursor"}, status=400)
+    rows, next_seq, more = changes.read_changes(after, limit)
+    return JsonResponse({"after": after, "next": next_seq, "more": more, "changes": rows})